@@ -40,7 +40,10 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'corsheaders',
+    'documents',
     'summary',
+    'risk',
+    'jobs',
 ]
 
 MIDDLEWARE = [
@@ -57,6 +60,7 @@ MIDDLEWARE = [
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
 ]
+CORS_EXPOSE_HEADERS = ["Retry-After", "Server-Timing"]
 
 ROOT_URLCONF = 'Backend.urls'
 
@@ -131,4 +135,148 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AES_ENCRYPTION_KEY = b'ThisIsASecretKey1234567890123415'
-#print(len(AES_ENCRYPTION_KEY))
\ No newline at end of file
+#print(len(AES_ENCRYPTION_KEY))
+
+# Risk analysis results keyed on upload content and ruleset version.
+# Swap BACKEND for risk.cache.DjangoResultCache or risk.cache.FileResultCache
+# to share results between worker processes.
+RISK_RESULT_CACHE = {
+    "BACKEND": "risk.cache.LocMemResultCache",
+    "OPTIONS": {"max_entries": 256},
+}
+
+# Batch risk analysis (/risk/analyze-batch/). Workers default to one per core.
+# Batches over RISK_BATCH_MAX_FILES PDFs, with a PDF over
+# RISK_BATCH_MAX_FILE_BYTES or over RISK_BATCH_MAX_BYTES in total
+# (uncompressed, for zip members) are rejected with 413.
+RISK_BATCH_WORKERS = None
+RISK_BATCH_MAX_FILES = 500
+RISK_BATCH_MAX_FILE_BYTES = 50 * 1024 * 1024
+RISK_BATCH_MAX_BYTES = 500 * 1024 * 1024
+
+# Allow large batches (e.g. a zip of a deal room) to be uploaded in one request.
+DATA_UPLOAD_MAX_NUMBER_FILES = RISK_BATCH_MAX_FILES
+
+# Document-type classification stops reading pages once one type leads by
+# RISK_CLASSIFICATION_MARGIN distinct keywords, or after the page cap.
+RISK_CLASSIFICATION_MARGIN = 3
+RISK_CLASSIFICATION_MAX_PAGES = 5
+
+# Keyword/weight rulesets (JSON or YAML). Edit the files and run
+# `manage.py reload_risk_rulesets`; workers pick up changes within
+# RISK_RULESET_CHECK_INTERVAL seconds. Set RISK_RULESET_RELOAD_SIGNAL
+# (e.g. "SIGUSR2") to make a process reload on its next lookup after that
+# signal.
+RISK_RULESET_DIR = os.path.join(BASE_DIR, "risk", "rulesets")
+RISK_RULESET_CHECK_INTERVAL = 5
+RISK_RULESET_RELOAD_SIGNAL = None
+
+# Asynchronous job mode: POST with mode=async to /summary/extract-text/ or
+# /risk/analyze/ to get a job id back immediately. Jobs are queued in the
+# database and executed by `manage.py run_job_workers`.
+JOBS_INPUT_DIR = os.path.join(MEDIA_ROOT, "jobs")
+JOBS_WORKERS = None
+JOBS_POLL_INTERVAL = 1.0
+JOBS_STALE_AFTER = 3600
+JOB_HANDLERS = {
+    "summary.extract_text": "summary.pipeline.run_extract_text_job",
+    "risk.analyze": "risk.tasks.run_analysis_job",
+}
+
+# PDF text extraction per endpoint. ENGINE is "pdfplumber" (layout-aware,
+# slow) or "pdfium" (native, much faster). Documents with at least
+# PARALLEL_MIN_PAGES pages are extracted by WORKERS processes (0 disables).
+PDF_EXTRACTION = {
+    "summary": {"ENGINE": "pdfplumber", "PARALLEL_MIN_PAGES": 0, "WORKERS": None},
+    "risk": {"ENGINE": "pdfium", "PARALLEL_MIN_PAGES": 0, "WORKERS": None},
+}
+
+# Uploads are processed in memory (or from Django's spooled temp file) and
+# not written to MEDIA_ROOT unless retention is enabled. Retained copies are
+# stored once per content hash; `manage.py gc_uploads` removes duplicates
+# and, with UPLOAD_RETENTION_DAYS set, expired copies.
+UPLOAD_RETENTION = False
+UPLOAD_RETENTION_DAYS = None
+
+# The spaCy and BART models load lazily on first use. /summary/ready/
+# returns 503 until they are loaded and warmed up by a dummy inference; the
+# first probe starts that in the background. Set this to start it when a
+# worker boots instead. `manage.py warmup_models` does the same in the
+# foreground.
+SUMMARY_WARMUP_ON_START = False
+
+# Number of summary chunks tokenized together and passed to one
+# model.generate call.
+SUMMARY_BATCH_SIZE = 4
+
+# Sentences repeated at the start of the next summary chunk for context.
+SUMMARY_CHUNK_OVERLAP = 0
+
+# "sections" gives one summary per chunk, covering the whole document;
+# "hierarchical" summarizes the chunk summaries again into a single document
+# summary, making at most SUMMARY_GENERATE_BUDGET model.generate calls per
+# document (None for no limit) by sampling longer documents evenly.
+SUMMARY_MODE = "sections"
+SUMMARY_GENERATE_BUDGET = 16
+
+# clean_text tokenizes lines in batches of this size through nlp.pipe;
+# more than one process only pays off for very long documents.
+SUMMARY_CLEAN_BATCH_SIZE = 1000
+SUMMARY_CLEAN_PROCESSES = 1
+
+# Inference backend for the BART summarizer: "torch" (fp32), "torch-int8"
+# (dynamic int8 quantization of the Linear layers) or "onnx" (ONNX Runtime,
+# needs `pip install "optimum[onnxruntime]"`). The ONNX export is written to
+# SUMMARY_ONNX_DIR on first load and reused afterwards.
+# `manage.py compare_summary_backends` measures the trade-off on your corpus.
+SUMMARY_BACKEND = "torch"
+SUMMARY_ONNX_DIR = os.path.join(BASE_DIR, "models", "bart-large-cnn-onnx")
+
+# Decoding used for new summaries: "sample" (varied output), "greedy" or
+# "beam" (deterministic). Deterministic summaries are cached in the
+# database by cleaned text, model, backend and generation settings, keeping
+# the SUMMARY_CACHE_MAX_ENTRIES most recently used (0 disables the cache).
+# Regenerating a summary samples a new variant unless asked otherwise.
+SUMMARY_GENERATION = "greedy"
+SUMMARY_CACHE_MAX_ENTRIES = 1000
+
+# Optional shared model server. When set to a Unix socket path or
+# loopback "host:port", web workers send summarize, clean and key-clause
+# requests to `manage.py run_model_server` instead of loading the models
+# themselves. The server merges concurrent summaries into batches of up to
+# SUMMARY_MODEL_SERVER_MAX_BATCH texts, waiting at most
+# SUMMARY_MODEL_SERVER_MAX_WAIT seconds for a batch to fill. Requests are
+# pickled, so connections are authenticated with SUMMARY_MODEL_SERVER_AUTHKEY:
+# it is required for TCP; a Unix socket (created mode 0600) falls back to
+# SECRET_KEY. Load a real key from the environment rather than this file.
+SUMMARY_MODEL_SERVER = None
+SUMMARY_MODEL_SERVER_AUTHKEY = None
+SUMMARY_MODEL_SERVER_MAX_BATCH = 8
+SUMMARY_MODEL_SERVER_MAX_WAIT = 0.02
+
+# Admission control for summarization. At most SUMMARY_INFERENCE_CONCURRENCY
+# inferences run at once across all web and job worker processes on the
+# host; the shared slots are file locks in SUMMARY_INFERENCE_LOCK_DIR, which
+# must be on a local filesystem (default: a directory under the system
+# temp dir). Within a web process at most SUMMARY_INFERENCE_QUEUE requests
+# wait, each for up to SUMMARY_INFERENCE_QUEUE_TIMEOUT seconds; past that
+# the request is answered with 503 and a Retry-After header. Queued jobs
+# wait for a slot instead. Responses carry a Server-Timing header with the
+# queue wait and inference time. Each inference gets SUMMARY_TORCH_THREADS
+# intra-op threads (default: cores divided by the concurrency).
+# Where file locks are unavailable (Windows) the limit is per process; set
+# SUMMARY_INFERENCE_PROCESSES to the number of web plus job worker
+# processes so the default thread budget is split between them.
+SUMMARY_INFERENCE_CONCURRENCY = 1
+SUMMARY_INFERENCE_QUEUE = 4
+SUMMARY_INFERENCE_QUEUE_TIMEOUT = 30
+SUMMARY_INFERENCE_PROCESSES = None
+SUMMARY_TORCH_THREADS = None
+
+# The recent-document and documents/ listings are cached per user in the
+# default Django cache for SUMMARY_LISTING_CACHE_TIMEOUT seconds (0
+# disables), and dropped when that user uploads or regenerates a summary.
+# With several web processes, configure a shared CACHES backend so the
+# invalidation reaches all of them.
+SUMMARY_LISTING_CACHE_TIMEOUT = 60
+SUMMARY_LISTING_MAX_PAGE_SIZE = 100
@@ -0,0 +1,214 @@
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pdfplumber
+
+DEFAULT_ENGINE = "pdfplumber"
+DEFAULT_OPTIONS = {"ENGINE": DEFAULT_ENGINE, "PARALLEL_MIN_PAGES": 0, "WORKERS": None}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def text_segments(pages):
+    """Yields each non-empty page followed by the newline that separates it."""
+    for page in pages:
+        if page:
+            yield page + "\n"
+
+
+class ExtractedDocument:
+    """Lower-cased text of a PDF as one string."""
+
+    def __init__(self, pages):
+        self.text = "".join(text_segments(pages))
+
+
+def _pdfplumber_page_count(source):
+    with pdfplumber.open(source) as pdf:
+        return len(pdf.pages)
+
+
+def _pdfplumber_pages(source, start=0, stop=None):
+    with pdfplumber.open(source) as pdf:
+        for page in pdf.pages[start:stop]:
+            try:
+                text = page.extract_text() or ""
+            finally:
+                # pdfplumber keeps every page's characters and layout cached
+                # until the document closes; drop them as soon as we are done.
+                page.close()
+            yield text
+
+
+def _pdfium_page_count(source):
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(source)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def _pdfium_pages(source, start=0, stop=None):
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(source)
+    try:
+        for index in range(start, len(pdf) if stop is None else min(stop, len(pdf))):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            try:
+                text = textpage.get_text_range()
+            finally:
+                textpage.close()
+                page.close()
+            yield text.replace("\r\n", "\n").strip()
+    finally:
+        pdf.close()
+
+
+def pdf_errors():
+    """Exceptions the engines raise for files that are not readable PDFs.
+
+    Anything else (a crashed worker pool, a missing ruleset) is a server
+    problem and should not be reported as a bad upload.
+    """
+    from pdfminer.psexceptions import PSException
+    from pdfplumber.utils.exceptions import MalformedPDFException, PdfminerException
+    from pypdfium2 import PdfiumError
+
+    return PSException, PdfminerException, MalformedPDFException, PdfiumError
+
+
+# name -> (page iterator, page counter)
+ENGINES = {
+    "pdfplumber": (_pdfplumber_pages, _pdfplumber_page_count),
+    "pdfium": (_pdfium_pages, _pdfium_page_count),
+}
+
+
+def _engine(name):
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown PDF extraction engine {name!r}; choose from {sorted(ENGINES)}") from None
+
+
+def _extract_page_range(source, engine, start, stop):
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    return list(_engine(engine)[0](source, start, stop))
+
+
+def _get_pool(workers):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=workers or os.cpu_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _iter_parallel_pages(source, engine, page_count, workers):
+    workers = workers or os.cpu_count()
+    chunk_size = max(1, -(-page_count // (workers * 2)))
+    pool = _get_pool(workers)
+    futures = [
+        pool.submit(_extract_page_range, source, engine, start, min(start + chunk_size, page_count))
+        for start in range(0, page_count, chunk_size)
+    ]
+    try:
+        # Yield in page order as soon as each leading chunk is done, so
+        # consumers such as the classifier can start before the tail is read.
+        for future in futures:
+            yield from future.result()
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def iter_raw_pages(pdf_file, engine=DEFAULT_ENGINE, parallel_min_pages=0, workers=None):
+    """Yields the text of each page, ``""`` for pages without text.
+
+    ``pdf_file`` may be a path or a binary file object. With
+    ``parallel_min_pages`` set, documents at least that long are split into
+    page ranges extracted by a pool of worker processes.
+    """
+    pages, page_count = _engine(engine)
+    if not parallel_min_pages:
+        yield from pages(pdf_file)
+        return
+
+    source = pdf_file
+    if not isinstance(pdf_file, (str, os.PathLike)):
+        source = pdf_file.read()
+
+    def opened():
+        return io.BytesIO(source) if isinstance(source, bytes) else source
+
+    total = page_count(opened())
+    if total < parallel_min_pages:
+        yield from pages(opened())
+    else:
+        yield from _iter_parallel_pages(source, engine, total, workers)
+
+
+def iter_pages(pdf_file, **options):
+    for page_text in iter_raw_pages(pdf_file, **options):
+        yield page_text.lower()
+
+
+def extract_document(pdf_file, **options):
+    return ExtractedDocument(list(iter_pages(pdf_file, **options)))
+
+
+def load_document(source):
+    if isinstance(source, ExtractedDocument):
+        return source
+    return extract_document(source)
+
+
+def load_segments(source):
+    """Text of ``source`` as the pieces of ``ExtractedDocument.text``.
+
+    ``source`` may be an ``ExtractedDocument``, a PDF path or file object,
+    or an iterable of page texts; PDFs and pages are read lazily so callers
+    can process a document one page at a time.
+    """
+    if isinstance(source, ExtractedDocument):
+        return [source.text]
+    if isinstance(source, (str, os.PathLike)) or hasattr(source, "read"):
+        return text_segments(iter_pages(source))
+    return text_segments(source)
+
+
+def extraction_options(endpoint):
+    """Keyword arguments for ``iter_pages`` from ``settings.PDF_EXTRACTION``."""
+    from django.conf import settings
+
+    config = dict(DEFAULT_OPTIONS)
+    config.update(getattr(settings, "PDF_EXTRACTION", {}).get(endpoint, {}))
+    return {
+        "engine": config["ENGINE"],
+        "parallel_min_pages": config["PARALLEL_MIN_PAGES"],
+        "workers": config["WORKERS"],
+    }
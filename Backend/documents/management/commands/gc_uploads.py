@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from documents.uploads import UPLOAD_DIR, is_retained_name, iter_stored_uploads, stored_file_hash
+
+
+class Command(BaseCommand):
+    requires_system_checks = []
+    help = (
+        "Garbage-collect stored uploads: fold duplicate files into one copy per "
+        "content hash and delete copies older than UPLOAD_RETENTION_DAYS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report what would be deleted without deleting.")
+        parser.add_argument(
+            "--max-age-days",
+            type=float,
+            default=getattr(settings, "UPLOAD_RETENTION_DAYS", None),
+            help="Delete uploads older than this many days (default: UPLOAD_RETENTION_DAYS; unset keeps them).",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        cutoff = None
+        if options["max_age_days"] is not None:
+            cutoff = timezone.now() - timedelta(days=options["max_age_days"])
+
+        deleted = 0
+        renamed = 0
+        moved_to = set()
+
+        def delete(name, reason):
+            nonlocal deleted
+            self.stdout.write(f"{'Would delete' if dry_run else 'Deleting'} {name} ({reason})")
+            if not dry_run:
+                default_storage.delete(name)
+            deleted += 1
+
+        for name in list(iter_stored_uploads()):
+            if cutoff is not None and default_storage.get_modified_time(name) < cutoff:
+                delete(name, "expired")
+                continue
+            if is_retained_name(name):
+                continue
+
+            # Files saved under their original names before uploads were
+            # content-addressed; "contract_a1B2c3.pdf" style suffixes pile up
+            # for every re-upload of the same document.
+            canonical = f"{UPLOAD_DIR}/{stored_file_hash(name)}.pdf"
+            if canonical in moved_to or default_storage.exists(canonical):
+                delete(name, f"duplicate of {canonical}")
+                continue
+            self.stdout.write(f"{'Would move' if dry_run else 'Moving'} {name} to {canonical}")
+            if not dry_run:
+                with default_storage.open(name, "rb") as stored_file:
+                    default_storage.save(canonical, stored_file)
+                default_storage.delete(name)
+            moved_to.add(canonical)
+            renamed += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Would delete' if dry_run else 'Deleted'} {deleted} files and "
+            f"{'would move' if dry_run else 'moved'} {renamed} to content-addressed names."
+        ))
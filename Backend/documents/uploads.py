@@ -0,0 +1,58 @@
+import hashlib
+import os
+import re
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+UPLOAD_DIR = "uploads"
+RETAINED_NAME = re.compile(r"^[0-9a-f]{64}\.pdf$")
+
+
+def uploaded_file_hash(uploaded_file):
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def retain_uploaded_file(uploaded_file):
+    """Keeps a copy of the upload when ``UPLOAD_RETENTION`` is enabled.
+
+    Copies are stored once per content hash, so re-uploads of the same file
+    do not add to the media volume. Returns the storage name, or ``None``
+    when retention is off.
+    """
+    if not getattr(settings, "UPLOAD_RETENTION", False):
+        return None
+
+    name = f"{UPLOAD_DIR}/{uploaded_file_hash(uploaded_file)}.pdf"
+    if not default_storage.exists(name):
+        saved_name = default_storage.save(name, uploaded_file)
+        if saved_name != name:
+            # Another request stored the same content first.
+            default_storage.delete(saved_name)
+        uploaded_file.seek(0)
+    return name
+
+
+def iter_stored_uploads():
+    try:
+        _, file_names = default_storage.listdir(UPLOAD_DIR)
+    except (FileNotFoundError, NotImplementedError):
+        return
+    for file_name in file_names:
+        yield f"{UPLOAD_DIR}/{file_name}"
+
+
+def stored_file_hash(name):
+    digest = hashlib.sha256()
+    with default_storage.open(name, "rb") as stored_file:
+        for chunk in iter(lambda: stored_file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_retained_name(name):
+    return bool(RETAINED_NAME.match(os.path.basename(name)))
@@ -0,0 +1,62 @@
+import multiprocessing
+import os
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs.queue import requeue_stale_jobs
+from jobs.worker import work
+
+
+class Command(BaseCommand):
+    help = "Run a pool of worker processes that execute queued analysis jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=getattr(settings, "JOBS_WORKERS", None) or os.cpu_count(),
+            help="Number of worker processes (default: JOBS_WORKERS or one per core).",
+        )
+        parser.add_argument("--poll-interval", type=float, default=None, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Drain the queue and exit instead of polling forever.")
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale jobs.")
+
+        if options["workers"] <= 1:
+            work(0, options["poll_interval"], options["once"])
+            return
+
+        # Workers are not daemonic: jobs may start process pools of their own
+        # (parallel PDF extraction, multi-process text cleaning), which
+        # daemonic processes are not allowed to do. They are stopped here.
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(target=work, args=(index, options["poll_interval"], options["once"]))
+            for index in range(options["workers"])
+        ]
+
+        def stop(signum, frame):
+            raise SystemExit(0)
+
+        previous_handler = signal.signal(signal.SIGTERM, stop)
+        try:
+            for process in processes:
+                process.start()
+            self.stdout.write(f"Started {len(processes)} job workers.")
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            signal.signal(signal.SIGTERM, previous_handler)
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            for process in processes:
+                if process.pid is not None:
+                    process.join()
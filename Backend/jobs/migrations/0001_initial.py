@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:08
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=16)),
+                ('file_name', models.CharField(max_length=255)),
+                ('input_path', models.CharField(max_length=512)),
+                ('params', models.JSONField(default=dict)),
+                ('progress', models.FloatField(default=0.0)),
+                ('stage', models.CharField(blank=True, default='', max_length=64)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('result_status', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('worker', models.CharField(blank=True, default='', max_length=128)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='jobs_job_status_277b31_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,102 @@
+import os
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+
+def _input_dir():
+    return getattr(settings, "JOBS_INPUT_DIR", os.path.join(settings.MEDIA_ROOT, "jobs"))
+
+
+def wants_async(request):
+    return (request.POST.get("mode") or request.GET.get("mode")) == "async"
+
+
+def enqueue_job(kind, uploaded_file, params=None):
+    directory = _input_dir()
+    os.makedirs(directory, exist_ok=True)
+    job_id = uuid.uuid4()
+    input_path = os.path.join(directory, f"{job_id}.pdf")
+
+    with open(input_path, "wb") as destination:
+        for chunk in uploaded_file.chunks():
+            destination.write(chunk)
+
+    return Job.objects.create(
+        id=job_id,
+        kind=kind,
+        file_name=uploaded_file.name,
+        input_path=input_path,
+        params=params or {},
+    )
+
+
+def job_accepted_response(request, job):
+    return JsonResponse({
+        "job_id": str(job.id),
+        "status": job.status,
+        "status_url": request.build_absolute_uri(f"/jobs/{job.id}/"),
+        "events_url": request.build_absolute_uri(f"/jobs/{job.id}/events/"),
+    }, status=202)
+
+
+def claim_next_job(worker):
+    # Claim with a conditional UPDATE so several workers can poll the same
+    # table without a broker or row locks (SQLite has no SELECT FOR UPDATE).
+    while True:
+        job_id = (
+            Job.objects.filter(status=Job.QUEUED)
+            .order_by("created_at")
+            .values_list("id", flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        claimed = Job.objects.filter(id=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING, worker=worker, started_at=timezone.now(), stage="starting"
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+
+
+def run_job(job):
+    handlers = getattr(settings, "JOB_HANDLERS", {})
+
+    def progress(fraction, stage):
+        Job.objects.filter(id=job.id).update(progress=fraction, stage=stage)
+
+    try:
+        handler = import_string(handlers[job.kind])
+        payload, status = handler(job, progress)
+    except Exception as e:
+        traceback.print_exc()
+        Job.objects.filter(id=job.id).update(
+            status=Job.FAILED, error=str(e) or e.__class__.__name__, finished_at=timezone.now()
+        )
+    else:
+        Job.objects.filter(id=job.id).update(
+            status=Job.DONE, progress=1.0, stage="done", result=payload,
+            result_status=status, finished_at=timezone.now()
+        )
+    finally:
+        try:
+            os.remove(job.input_path)
+        except OSError:
+            pass
+
+
+def requeue_stale_jobs():
+    stale_after = getattr(settings, "JOBS_STALE_AFTER", 3600)
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    with transaction.atomic():
+        return Job.objects.filter(status=Job.RUNNING, started_at__lt=cutoff).update(
+            status=Job.QUEUED, worker="", stage="", progress=0.0, started_at=None
+        )
@@ -0,0 +1,142 @@
+import os
+import tempfile
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.db.models.query import QuerySet
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Job
+from .queue import claim_next_job, requeue_stale_jobs, run_job
+
+
+def succeeding_handler(job, progress):
+    progress(0.5, "halfway")
+    return {"file_name": job.file_name}, 200
+
+
+def failing_handler(job, progress):
+    raise RuntimeError("could not read the PDF")
+
+
+TEST_HANDLERS = {
+    "test.succeed": "jobs.tests.succeeding_handler",
+    "test.fail": "jobs.tests.failing_handler",
+}
+
+
+class JobTestCase(TestCase):
+    def create_job(self, kind="test.succeed", **fields):
+        handle, input_path = tempfile.mkstemp(suffix=".pdf")
+        os.close(handle)
+        self.addCleanup(lambda: os.path.exists(input_path) and os.remove(input_path))
+        job = Job.objects.create(kind=kind, file_name="contract.pdf", input_path=input_path)
+        if fields:
+            Job.objects.filter(id=job.id).update(**fields)
+            job.refresh_from_db()
+        return job
+
+
+class ClaimNextJobTests(JobTestCase):
+    def test_claims_oldest_queued_job_once(self):
+        first = self.create_job()
+        second = self.create_job()
+
+        claimed = claim_next_job("worker-a")
+        self.assertEqual(claimed.id, first.id)
+        self.assertEqual((claimed.status, claimed.worker), (Job.RUNNING, "worker-a"))
+        self.assertEqual(claim_next_job("worker-b").id, second.id)
+        self.assertIsNone(claim_next_job("worker-c"))
+
+    def test_skips_a_job_claimed_by_another_worker_in_between(self):
+        contested = self.create_job()
+        other = self.create_job()
+        first = QuerySet.first
+        raced = []
+
+        def first_then_race(queryset):
+            job_id = first(queryset)
+            if not raced:
+                # Another worker claims the job between our SELECT and UPDATE.
+                raced.append(job_id)
+                Job.objects.filter(id=job_id).update(status=Job.RUNNING, worker="worker-b")
+            return job_id
+
+        with mock.patch.object(QuerySet, "first", first_then_race):
+            claimed = claim_next_job("worker-a")
+
+        self.assertEqual(raced, [contested.id])
+        self.assertEqual(claimed.id, other.id)
+        contested.refresh_from_db()
+        self.assertEqual(contested.worker, "worker-b")
+
+
+@override_settings(JOB_HANDLERS=TEST_HANDLERS)
+class RunJobTests(JobTestCase):
+    def test_success_stores_the_result(self):
+        job = self.create_job("test.succeed")
+        run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual((job.progress, job.stage), (1.0, "done"))
+        self.assertEqual(job.result, {"file_name": "contract.pdf"})
+        self.assertEqual(job.result_status, 200)
+        self.assertIsNotNone(job.finished_at)
+        self.assertFalse(os.path.exists(job.input_path))
+
+    def test_failure_stores_the_error(self):
+        job = self.create_job("test.fail")
+        with mock.patch("traceback.print_exc"):
+            run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.error, "could not read the PDF")
+        self.assertIsNone(job.result)
+        self.assertFalse(os.path.exists(job.input_path))
+
+
+class RequeueStaleJobsTests(JobTestCase):
+    @override_settings(JOBS_STALE_AFTER=60)
+    def test_requeues_only_jobs_running_too_long(self):
+        stale = self.create_job(
+            status=Job.RUNNING, worker="gone", stage="summarizing", progress=0.4,
+            started_at=timezone.now() - timedelta(minutes=5),
+        )
+        running = self.create_job(status=Job.RUNNING, worker="alive", started_at=timezone.now())
+
+        self.assertEqual(requeue_stale_jobs(), 1)
+
+        stale.refresh_from_db()
+        self.assertEqual((stale.status, stale.worker, stale.stage, stale.progress), (Job.QUEUED, "", "", 0.0))
+        self.assertIsNone(stale.started_at)
+        running.refresh_from_db()
+        self.assertEqual((running.status, running.worker), (Job.RUNNING, "alive"))
+
+
+@override_settings(JOB_HANDLERS=TEST_HANDLERS)
+class JobStatusViewTests(JobTestCase):
+    def test_reports_progress_and_result(self):
+        job = self.create_job(status=Job.RUNNING, progress=0.25, stage="cleaning")
+        body = self.client.get(f"/jobs/{job.id}/").json()
+        self.assertEqual((body["status"], body["progress"], body["stage"]), (Job.RUNNING, 0.25, "cleaning"))
+        self.assertNotIn("result", body)
+
+        run_job(job)
+        body = self.client.get(f"/jobs/{job.id}/").json()
+        self.assertEqual(body["status"], Job.DONE)
+        self.assertEqual(body["result"], {"file_name": "contract.pdf"})
+        self.assertEqual(body["result_status"], 200)
+
+    def test_failed_job_reports_the_error(self):
+        job = self.create_job("test.fail")
+        with mock.patch("traceback.print_exc"):
+            run_job(job)
+        body = self.client.get(f"/jobs/{job.id}/").json()
+        self.assertEqual((body["status"], body["error"]), (Job.FAILED, "could not read the PDF"))
+
+    def test_unknown_job(self):
+        self.assertEqual(self.client.get(f"/jobs/{uuid.uuid4()}/").status_code, 404)
@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import job_status, job_events
+
+urlpatterns = [
+    path('<uuid:job_id>/', job_status),
+    path('<uuid:job_id>/events/', job_events),
+]
@@ -0,0 +1,54 @@
+import json
+import time
+
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.decorators import api_view
+
+from .models import Job
+
+
+@api_view(["GET"])
+def job_status(request, job_id):
+    try:
+        job = Job.objects.get(id=job_id)
+    except Job.DoesNotExist:
+        return JsonResponse({"error": "Job not found"}, status=404)
+    return JsonResponse(job.as_dict())
+
+
+def _event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+def _job_events(job_id):
+    poll_interval = getattr(settings, "JOBS_EVENTS_POLL_INTERVAL", 0.5)
+    timeout = getattr(settings, "JOBS_EVENTS_TIMEOUT", 600)
+    deadline = time.monotonic() + timeout
+    last_state = None
+
+    while time.monotonic() < deadline:
+        job = Job.objects.filter(id=job_id).first()
+        if job is None:
+            yield _event("error", {"error": "Job not found"})
+            return
+        state = (job.status, job.progress, job.stage)
+        if state != last_state:
+            last_state = state
+            if job.is_finished:
+                yield _event(job.status, job.as_dict())
+                return
+            yield _event("progress", {"status": job.status, "progress": round(job.progress, 3), "stage": job.stage})
+        else:
+            # Comment lines keep proxies from closing an idle stream.
+            yield ": keep-alive\n\n"
+        time.sleep(poll_interval)
+
+    yield _event("timeout", {"job_id": str(job_id)})
+
+
+def job_events(request, job_id):
+    response = StreamingHttpResponse(_job_events(job_id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
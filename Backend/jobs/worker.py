@@ -0,0 +1,30 @@
+import os
+import socket
+import time
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections
+
+
+def work(worker_index, poll_interval=None, once=False):
+    """Loop of one worker process: claim the oldest queued job, run it, repeat."""
+    # Spawned worker processes start with a fresh interpreter.
+    if not apps.ready:
+        django.setup()
+
+    from .queue import claim_next_job, run_job
+
+    poll_interval = poll_interval or getattr(settings, "JOBS_POLL_INTERVAL", 1.0)
+    worker = f"{socket.gethostname()}:{os.getpid()}:{worker_index}"
+
+    while True:
+        close_old_connections()
+        job = claim_next_job(worker)
+        if job is None:
+            if once:
+                return
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
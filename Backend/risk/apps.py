@@ -1,6 +1,30 @@
+import signal
+import threading
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class RiskConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'risk'
+
+    def ready(self):
+        from . import rules
+
+        rules.configure(
+            directory=getattr(settings, "RISK_RULESET_DIR", None),
+            check_interval=getattr(settings, "RISK_RULESET_CHECK_INTERVAL", None),
+        )
+
+        reload_signal = getattr(settings, "RISK_RULESET_RELOAD_SIGNAL", None)
+        if reload_signal and threading.current_thread() is threading.main_thread():
+            signal.signal(getattr(signal, reload_signal), _reload_rulesets_on_signal)
+
+
+def _reload_rulesets_on_signal(signum, frame):
+    from . import rules
+
+    # Reloading here could deadlock on the rules lock if the signal
+    # interrupted a reload, so only flag it for the next lookup.
+    rules.request_reload()
@@ -0,0 +1,156 @@
+import os
+import threading
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from .cache import get_result_cache, result_cache_key
+from .pipeline import analyze_pdf_bytes
+from . import rules
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            max_workers = getattr(settings, "RISK_BATCH_WORKERS", None) or os.cpu_count()
+            context = multiprocessing.get_context(getattr(settings, "RISK_BATCH_START_METHOD", "spawn"))
+            _pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=context,
+                initializer=rules.configure,
+                initargs=(rules.current_config()["directory"], rules.current_config()["check_interval"]),
+            )
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+class BatchTooLarge(ValueError):
+    pass
+
+
+def _read_member(archive, member, limit):
+    # file_size comes from the archive's own headers, so the read is capped
+    # as well in case it understates what the member inflates to.
+    with archive.open(member) as member_file:
+        content = member_file.read(limit + 1)
+    if len(content) > limit:
+        raise BatchTooLarge(f"{member.filename} is larger than {limit} bytes uncompressed.")
+    return content
+
+
+def collect_batch_files(uploaded_files, max_files=500, max_bytes=None, max_file_bytes=None):
+    """Yields ``(name, content)`` for every PDF, expanding zip archives.
+
+    Other files, uploaded directly or inside an archive, are skipped.
+
+    Raises ``BatchTooLarge`` as soon as the batch has more than
+    ``max_files`` PDFs, a file is over ``max_file_bytes`` or all of them
+    together are over ``max_bytes``, checking zip members before they are
+    decompressed.
+    """
+    count = 0
+    total = 0
+
+    def admit(name, size):
+        nonlocal count, total
+        count += 1
+        total += size
+        if count > max_files:
+            raise BatchTooLarge(f"A batch may contain at most {max_files} PDF files.")
+        if max_file_bytes is not None and size > max_file_bytes:
+            raise BatchTooLarge(f"{name} is larger than {max_file_bytes} bytes.")
+        if max_bytes is not None and total > max_bytes:
+            raise BatchTooLarge(f"A batch may contain at most {max_bytes} bytes of PDFs.")
+
+    for uploaded_file in uploaded_files:
+        name = uploaded_file.name.lower()
+        if name.endswith(".zip"):
+            with zipfile.ZipFile(uploaded_file) as archive:
+                for member in archive.infolist():
+                    if member.is_dir() or not member.filename.lower().endswith(".pdf"):
+                        continue
+                    admit(member.filename, member.file_size)
+                    limit = member.file_size
+                    if max_file_bytes is not None:
+                        limit = min(limit, max_file_bytes)
+                    yield member.filename, _read_member(archive, member, limit)
+        elif name.endswith(".pdf"):
+            admit(uploaded_file.name, uploaded_file.size)
+            yield uploaded_file.name, uploaded_file.read()
+
+
+def analyze_batch(files, **options):
+    cache = get_result_cache()
+    results = [None] * len(files)
+    pending = {}
+
+    for index, (name, content) in enumerate(files):
+        cache_key = result_cache_key(content)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            results[index] = {"file_name": name, **cached}
+        else:
+            pending[index] = cache_key
+
+    if pending:
+        pool = get_process_pool()
+        futures = {index: pool.submit(analyze_pdf_bytes, files[index][1], **options) for index in pending}
+        for index, future in futures.items():
+            name = files[index][0]
+            try:
+                payload, status = future.result()
+            except BrokenProcessPool:
+                _discard_pool(pool)
+                payload, status = {"error": "Analysis worker crashed."}, 500
+            except Exception as e:
+                payload, status = {"error": f"Analysis failed: {str(e)}"}, 500
+            else:
+                cache.set(pending[index], {"payload": payload, "status": status})
+            results[index] = {"file_name": name, "payload": payload, "status": status}
+
+    return {"results": results, "aggregate": aggregate_results(results)}
+
+
+def _risk_percentage(payload):
+    if "risk_analysis" in payload:
+        return payload["risk_analysis"].get("risk_percentage")
+    return payload.get("risk_percentage")
+
+
+def aggregate_results(results):
+    by_type = {}
+    percentages = []
+    failed = 0
+
+    for result in results:
+        if result["status"] != 200:
+            failed += 1
+            continue
+        payload = result["payload"]
+        by_type[payload["document_type"]] = by_type.get(payload["document_type"], 0) + 1
+        percentage = _risk_percentage(payload)
+        if percentage is not None:
+            percentages.append(percentage)
+
+    return {
+        "total_files": len(results),
+        "analyzed": len(results) - failed,
+        "failed": failed,
+        "by_document_type": by_type,
+        "average_risk_percentage": round(sum(percentages) / len(percentages), 2) if percentages else None,
+        "max_risk_percentage": max(percentages) if percentages else None,
+    }
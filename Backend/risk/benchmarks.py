@@ -0,0 +1,205 @@
+import io
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+from documents.extraction import DEFAULT_ENGINE, ExtractedDocument, iter_pages, text_segments
+from .construction import SENTENCE_BOUNDARY as CONSTRUCTION_SENTENCE_BOUNDARY, analyze_construction_risk
+from .finance import SENTENCE_BOUNDARY as FINANCE_SENTENCE_BOUNDARY, analyze_finance_risk
+from .pipeline import DOCUMENT_TYPE_RULESET, classify_pages
+from .realEstate import SENTENCE_BOUNDARY as REAL_ESTATE_SENTENCE_BOUNDARY, analyze_real_estate_risk
+from .rules import get_ruleset
+from .utils import StreamingSentenceIndex
+
+DOMAINS = {
+    "real_estate": (analyze_real_estate_risk, REAL_ESTATE_SENTENCE_BOUNDARY),
+    "construction": (analyze_construction_risk, CONSTRUCTION_SENTENCE_BOUNDARY),
+    "finance": (analyze_finance_risk, FINANCE_SENTENCE_BOUNDARY),
+}
+
+FILLER_WORDS = (
+    "the", "party", "shall", "agreement", "hereby", "provided", "that", "under", "this", "clause",
+    "schedule", "notwithstanding", "pursuant", "to", "section", "any", "such", "and", "or", "of",
+    "within", "days", "written", "consent", "obligations", "herein", "respective", "successors",
+)
+LINES_PER_PAGE = 50
+CHARS_PER_LINE = 90
+
+
+def synthetic_pages(domain, page_count, keyword_density=0.02, seed=0):
+    """Generates page texts of filler sentences salted with a domain's keywords.
+
+    ``keyword_density`` is the share of emitted phrases that are risk or
+    document-type keywords of ``domain``.
+    """
+    rng = random.Random(f"{domain}-{page_count}-{keyword_density}-{seed}")
+    keywords = [keyword for words in get_ruleset(domain).keywords.values() for keyword in words]
+    keywords += get_ruleset(DOCUMENT_TYPE_RULESET).keywords.get(domain, [])
+
+    pages = []
+    for _ in range(page_count):
+        lines = []
+        line = []
+        line_length = 0
+        sentence_length = 0
+        while len(lines) < LINES_PER_PAGE:
+            word = rng.choice(keywords) if rng.random() < keyword_density else rng.choice(FILLER_WORDS)
+            sentence_length += 1
+            if sentence_length >= 12 and rng.random() < 0.2:
+                word += "."
+                sentence_length = 0
+            if line_length + len(word) + 1 > CHARS_PER_LINE:
+                lines.append(" ".join(line))
+                line = []
+                line_length = 0
+            line.append(word)
+            line_length += len(word) + 1
+        pages.append(lines)
+    return pages
+
+
+def _pdf_string(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_pdf(pages):
+    """Writes a minimal PDF with one Helvetica text block per page of lines."""
+    objects = [None, None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+
+    for lines in pages:
+        commands = ["BT", "/F1 10 Tf", "12 TL", "40 800 Td"]
+        for line in lines:
+            commands.append(f"({_pdf_string(line)}) Tj T*")
+        commands.append("ET")
+        stream = "\n".join(commands).encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref_offset = output.tell()
+    output.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        output.write(b"%010d 00000 n \n" % offset)
+    output.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset))
+    return output.getvalue()
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def benchmark_document(domain, pdf_bytes, repeat=3, extraction=None):
+    analyze, sentence_boundary = DOMAINS[domain]
+    ruleset = get_ruleset(domain)
+    timings = {"extraction": [], "classification": [], "scoring": [], "evidence": [], "analysis": []}
+
+    for _ in range(repeat):
+        seconds, pages = _timed(lambda: list(iter_pages(io.BytesIO(pdf_bytes), **(extraction or {}))))
+        timings["extraction"].append(seconds)
+        document = ExtractedDocument(pages)
+
+        seconds, _ = _timed(classify_pages, iter(pages))
+        timings["classification"].append(seconds)
+
+        seconds, _ = _timed(ruleset.matcher.count, document.text)
+        timings["scoring"].append(seconds)
+
+        def gather_evidence():
+            sentences = StreamingSentenceIndex(sentence_boundary)
+            ruleset.matcher.count_segments(text_segments(pages), sentences, substring_evidence=domain != "finance")
+            return {category: sentences.lookup(category, 3) for category in ruleset.keywords}
+
+        seconds, _ = _timed(gather_evidence)
+        timings["evidence"].append(seconds)
+
+        seconds, _ = _timed(analyze, document)
+        timings["analysis"].append(seconds)
+
+    return {
+        "text_chars": len(document.text),
+        "seconds": {stage: statistics.median(values) for stage, values in timings.items()},
+        "min_seconds": {stage: min(values) for stage, values in timings.items()},
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(domains=None, page_counts=(10, 100), densities=(0.02,), repeat=3, seed=0, progress=None,
+                   extraction=None):
+    """Benchmarks every case with the given ``iter_pages`` options.
+
+    Pass ``extraction_options("risk")`` to time the engine the risk
+    endpoint actually uses; the options are recorded in the report.
+    """
+    extraction = dict(extraction or {})
+    results = []
+    for domain in domains or DOMAINS:
+        for page_count in page_counts:
+            for density in densities:
+                pdf_bytes = build_pdf(synthetic_pages(domain, page_count, density, seed))
+                result = benchmark_document(domain, pdf_bytes, repeat, extraction)
+                result.update({"domain": domain, "pages": page_count, "keyword_density": density, "pdf_bytes": len(pdf_bytes)})
+                results.append(result)
+                if progress:
+                    progress(result)
+
+    return {
+        "meta": {
+            "revision": _git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "seed": seed,
+            "engine": extraction.get("engine", DEFAULT_ENGINE),
+            "extraction": extraction,
+        },
+        "results": results,
+    }
+
+
+def compare_results(baseline, current):
+    """Pairs up matching cases of two reports and returns per-stage ratios."""
+    def case_key(result):
+        return result["domain"], result["pages"], result["keyword_density"]
+
+    baseline_cases = {case_key(result): result for result in baseline["results"]}
+    comparisons = []
+    for result in current["results"]:
+        previous = baseline_cases.get(case_key(result))
+        if previous is None:
+            continue
+        ratios = {
+            stage: (seconds / previous["seconds"][stage]) if previous["seconds"].get(stage) else None
+            for stage, seconds in result["seconds"].items()
+        }
+        comparisons.append({"domain": result["domain"], "pages": result["pages"],
+                            "keyword_density": result["keyword_density"], "ratios": ratios})
+    return comparisons
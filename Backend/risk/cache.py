@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+DEFAULT_RESULT_CACHE = {
+    "BACKEND": "risk.cache.LocMemResultCache",
+    "OPTIONS": {"max_entries": 256},
+}
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+class LocMemResultCache:
+    """Per-process LRU cache bounded by entry count."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DjangoResultCache:
+    """Stores results in one of the configured Django CACHES.
+
+    Size bounds and eviction are those of the chosen cache backend
+    (e.g. ``MAX_ENTRIES`` for the database and file-based caches).
+    """
+
+    def __init__(self, alias="default", timeout=None, key_prefix="risk-result"):
+        self.alias = alias
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+
+    @property
+    def _cache(self):
+        from django.core.cache import caches
+        return caches[self.alias]
+
+    def get(self, key):
+        return self._cache.get(f"{self.key_prefix}:{key}")
+
+    def set(self, key, value):
+        self._cache.set(f"{self.key_prefix}:{key}", value, self.timeout)
+
+    def clear(self):
+        self._cache.clear()
+
+
+class FileResultCache:
+    """JSON files in a local directory, evicted least-recently-used by mtime."""
+
+    def __init__(self, directory=None, max_entries=1024):
+        self.directory = directory or os.path.join(settings.MEDIA_ROOT, "risk-cache")
+        self.max_entries = max_entries
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as cache_file:
+                value = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def set(self, key, value):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as cache_file:
+            json.dump(value, cache_file)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    continue
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        if not os.path.isdir(self.directory):
+            return
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                os.remove(entry.path)
+
+
+def get_result_cache():
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                config = getattr(settings, "RISK_RESULT_CACHE", DEFAULT_RESULT_CACHE)
+                backend = import_string(config["BACKEND"])
+                _result_cache = backend(**config.get("OPTIONS", {}))
+    return _result_cache
+
+
+def ruleset_fingerprint():
+    from documents.extraction import extraction_options
+    from .pipeline import CLASSIFICATION_MARGIN, CLASSIFICATION_MAX_PAGES
+    from .rules import rulesets_fingerprint
+
+    # Engines differ slightly in the text they produce, so results from one
+    # must not be served for another.
+    classification = "{}:{}:{}".format(
+        getattr(settings, "RISK_CLASSIFICATION_MARGIN", CLASSIFICATION_MARGIN),
+        getattr(settings, "RISK_CLASSIFICATION_MAX_PAGES", CLASSIFICATION_MAX_PAGES),
+        extraction_options("risk")["engine"],
+    )
+    return f"{rulesets_fingerprint()}-{classification}"
+
+
+def result_cache_key(content):
+    return f"{hashlib.sha256(content).hexdigest()}-{ruleset_fingerprint()}"
@@ -1,89 +1,50 @@
 import re
-import pdfplumber
+from documents.extraction import extract_document, load_segments
+from .rules import get_ruleset
+from .utils import SentenceIndex, StreamingSentenceIndex
 
-risk_keywords = {
-    "Reputational Risk": ["negative publicity", "brand damage", "customer dissatisfaction", "misleading statements",
-                          "ethical concerns", "data privacy violation", "media scrutiny", "regulatory fines",
-                          "whistleblower", "fraud scandal", "corporate governance failure"],
-    "Loan Amount": ["loan amount", "borrow", "total sum"],
-    "Interest Rate": ["interest rate", "floating", "fixed", "variable"],
-    "Repayment Terms": ["repay", "installment", "EMI", "payment schedule"],
-    "Prepayment Penalties": ["prepayment", "early payment", "penalty", "late charges"],
-    "Penal Interest": ["penal interest", "penalty interest", "additional charges", "delayed interest", "extra interest"],
-    "Property & Collateral": ["mortgage", "pledge", "collateral", "security"],
-    "Default Consequences": ["default", "bankruptcy", "foreclosure", "inability to pay"],
-    "Preprocessing Charges": ["processing fee", "loan processing charge", "preprocessing charge", "application fee"]
-}
-
-risk_weights = {
-    "Reputational Risk": 2,
-    "Loan Amount": 4,
-    "Interest Rate": 4,
-    "Repayment Terms": 4,
-    "Prepayment Penalties": 5,
-    "Penal Interest": 3,
-    "Property & Collateral": 5,
-    "Default Consequences": 5,
-    "Preprocessing Charges": 3
-}
-
-
-average_weight = sum(risk_weights.values()) / len(risk_weights)
-expected_keyword_matches = 5
-RISK_THRESHOLD = int(len(risk_keywords) * average_weight * expected_keyword_matches)
-LOW_RISK_LIMIT = 30
-MODERATE_RISK_LIMIT = 60
+RULESET_NAME = "finance"
 
 
 def extract_text_from_pdf(pdf_path):
-    text = ""
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text() + " "
-    return text.lower()
+    return extract_document(pdf_path).text
 
-def find_relevant_sentences(text, keywords):
-    sentences = re.split(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?)\s', text)
-    relevant_sentences = []
-    for sentence in sentences:
-        if any(re.search(r"\b" + re.escape(keyword) + r"\b", sentence, re.IGNORECASE) for keyword in keywords):
-            relevant_sentences.append(sentence.strip())
-        if len(relevant_sentences) >= 3:
-            break
-    return relevant_sentences
+SENTENCE_BOUNDARY = re.compile(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?)\s')
+
+def find_relevant_sentences(sentences, category):
+    return sentences.lookup(category, 3)
 
 def extract_key_clauses(text):
+    ruleset = get_ruleset(RULESET_NAME)
+    sentences = SentenceIndex(text, SENTENCE_BOUNDARY)
+    ruleset.matcher.count(text, sentences)
     key_clauses = {}
-    sentences = re.split(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?)\s', text)
-    for category, keywords in risk_keywords.items():
-        for sentence in sentences:
-            if any(re.search(r'\b' + re.escape(keyword) + r'\b', sentence, re.IGNORECASE) for keyword in keywords):
-                key_clauses[category] = sentence.strip()
-                break
+    for category in ruleset.keywords:
+        matched = sentences.lookup(category, 1)
+        if matched:
+            key_clauses[category] = matched[0]
     return key_clauses
 
 def calculate_risk_score(text):
-    risk_scores = {category: 0 for category in risk_keywords}
+    return _score_segments([text])
+
+def _score_segments(segments):
+    ruleset = get_ruleset(RULESET_NAME)
+    risk_scores = {category: 0 for category in ruleset.keywords}
     relevant_data = {}
-    for category, keywords in risk_keywords.items():
-        relevant_sentences = find_relevant_sentences(text, keywords)
+    sentences = StreamingSentenceIndex(SENTENCE_BOUNDARY)
+    keyword_counts = ruleset.matcher.count_segments(segments, sentences)
+    for category in ruleset.keywords:
+        relevant_sentences = find_relevant_sentences(sentences, category)
         relevant_data[category] = relevant_sentences
-        for keyword in keywords:
-            occurrences = len(re.findall(r"\b" + re.escape(keyword) + r"\b", text, re.IGNORECASE))
-            risk_scores[category] += occurrences * risk_weights[category]
+        risk_scores[category] += keyword_counts[category] * ruleset.weights[category]
     total_score = sum(risk_scores.values())
-    risk_percentage = min((total_score / RISK_THRESHOLD) * 100, 100)
-    if risk_percentage <= LOW_RISK_LIMIT:
-        risk_category = "Low Risk"
-    elif risk_percentage <= MODERATE_RISK_LIMIT:
-        risk_category = "Moderate Risk"
-    else:
-        risk_category = "High Risk"
+    risk_percentage = min((total_score / ruleset.risk_threshold) * 100, 100)
+    risk_category = ruleset.risk_level(risk_percentage)
     return risk_scores, total_score, risk_percentage, risk_category, relevant_data
 
-def analyze_finance_risk(file_path):
-    text = extract_text_from_pdf(file_path)
-    risk_scores, total_score, risk_percentage, risk_category, relevant_data = calculate_risk_score(text)
+def analyze_finance_risk(source):
+    risk_scores, total_score, risk_percentage, risk_category, relevant_data = _score_segments(load_segments(source))
 
     result = {
         "risk_scores": risk_scores,
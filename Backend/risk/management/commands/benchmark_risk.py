@@ -0,0 +1,65 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from documents.extraction import ENGINES, extraction_options
+from risk.benchmarks import DOMAINS, compare_results, run_benchmarks
+
+
+class Command(BaseCommand):
+    requires_system_checks = []
+    help = (
+        "Benchmark PDF extraction, classification, scoring and evidence gathering "
+        "for each risk analyzer on synthetic documents, writing results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--domains", nargs="+", choices=sorted(DOMAINS), help="Analyzers to benchmark (default: all).")
+        parser.add_argument("--pages", nargs="+", type=int, default=[10, 100], help="Page counts to generate.")
+        parser.add_argument("--density", nargs="+", type=float, default=[0.02],
+                            help="Share of phrases that are risk keywords.")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the median is reported.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--engine", choices=sorted(ENGINES),
+                            help="PDF extraction engine (default: the one PDF_EXTRACTION configures for risk).")
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+        parser.add_argument("--compare", help="Earlier JSON report to compare against.")
+
+    def handle(self, *args, **options):
+        def progress(result):
+            stages = ", ".join(f"{stage} {seconds * 1000:.1f}ms" for stage, seconds in result["seconds"].items())
+            self.stderr.write(f"{result['domain']} {result['pages']}p density {result['keyword_density']}: {stages}")
+
+        extraction = extraction_options("risk")
+        if options["engine"]:
+            extraction["engine"] = options["engine"]
+
+        report = run_benchmarks(
+            domains=options["domains"],
+            page_counts=options["pages"],
+            densities=options["density"],
+            repeat=options["repeat"],
+            seed=options["seed"],
+            progress=progress,
+            extraction=extraction,
+        )
+
+        if options["compare"]:
+            try:
+                with open(options["compare"], "r", encoding="utf-8") as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read {options['compare']}: {e}")
+            report["comparison"] = {
+                "baseline_revision": baseline.get("meta", {}).get("revision"),
+                "baseline_engine": baseline.get("meta", {}).get("engine"),
+                "cases": compare_results(baseline, report),
+            }
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output_file:
+                output_file.write(output + "\n")
+            self.stderr.write(self.style.SUCCESS(f"Wrote {len(report['results'])} results to {options['output']}."))
+        else:
+            self.stdout.write(output)
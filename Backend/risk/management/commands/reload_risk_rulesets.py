@@ -0,0 +1,39 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from risk import rules
+
+
+class Command(BaseCommand):
+    requires_system_checks = []
+    help = (
+        "Validate the risk ruleset files and make running workers pick them up. "
+        "Workers re-read changed files within RISK_RULESET_CHECK_INTERVAL seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only validate the ruleset files; do not trigger a reload.",
+        )
+
+    def handle(self, *args, **options):
+        directory = rules.current_config()["directory"]
+        try:
+            rulesets = rules.load_rulesets(directory)
+        except (rules.RulesetError, OSError) as e:
+            raise CommandError(str(e))
+
+        for name, ruleset in sorted(rulesets.items()):
+            self.stdout.write(f"{name}: version {ruleset.version} ({len(ruleset.keywords)} categories) from {ruleset.source}")
+
+        if options["check"]:
+            return
+
+        # Workers compare file modification times, so touching the files is
+        # enough to make every process reload on its next check.
+        for ruleset in rulesets.values():
+            os.utime(ruleset.source)
+        self.stdout.write(self.style.SUCCESS(f"Reload triggered for {len(rulesets)} rulesets in {directory}."))
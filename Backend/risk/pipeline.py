@@ -0,0 +1,137 @@
+import io
+import itertools
+
+from documents.extraction import ExtractedDocument, extract_document, iter_pages, pdf_errors
+from .realEstate import analyze_real_estate_risk
+from .construction import analyze_construction_risk
+from .finance import analyze_finance_risk
+from .rules import get_ruleset
+
+DOCUMENT_TYPE_RULESET = "document_types"
+
+# A document type wins early once it leads the runner-up by this many
+# distinct keywords; otherwise classification stops after the page cap.
+CLASSIFICATION_MARGIN = 3
+CLASSIFICATION_MAX_PAGES = 5
+
+
+def identify_document_type(text):
+    hits = {
+        doc_type: sum(1 for word in keywords if word in text)
+        for doc_type, keywords in get_ruleset(DOCUMENT_TYPE_RULESET).keywords.items()
+    }
+
+    return max(hits, key=hits.get)
+
+
+def classify_pages(pages, margin=CLASSIFICATION_MARGIN, max_pages=CLASSIFICATION_MAX_PAGES):
+    """Reads pages from the ``pages`` iterator only until the type is clear.
+
+    Returns the document type and the pages consumed, so the caller can keep
+    reading the same iterator for the rest of the document.
+    """
+    document_types = get_ruleset(DOCUMENT_TYPE_RULESET).keywords
+    found = {doc_type: set() for doc_type in document_types}
+    read = []
+
+    for page in pages:
+        read.append(page)
+        for doc_type, keywords in document_types.items():
+            found[doc_type].update(word for word in keywords if word in page)
+        leader, runner_up = sorted((len(words) for words in found.values()), reverse=True)[:2]
+        if leader - runner_up >= margin or len(read) >= max_pages:
+            break
+
+    hits = {doc_type: len(words) for doc_type, words in found.items()}
+    return max(hits, key=hits.get), read
+
+
+def extract_document_from_pdf(pdf_file):
+    try:
+        return extract_document(pdf_file)
+    except pdf_errors() as e:
+        print("Error reading PDF:", e)
+        return ExtractedDocument([])
+
+
+class _PageTracker:
+    """Passes pages through, noting whether any of them had text."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.has_text = False
+
+    def __iter__(self):
+        for page in self.pages:
+            if page.strip():
+                self.has_text = True
+            yield page
+
+
+def _risk_payload(source, doc_type):
+    if doc_type == "real_estate":
+        risk_data = analyze_real_estate_risk(source)
+        return {
+            "document_type": "Real Estate",
+            "risk_analysis": risk_data
+        }
+
+    elif doc_type == "construction":
+        risk_data = analyze_construction_risk(source)
+        return {
+            "document_type": "Construction",
+            "overall_score": risk_data["total_score"],
+            "risk_percentage": risk_data["risk_percentage"],
+            "risk_level": risk_data["risk_level"],
+            "risk_details": risk_data["risk_details"]
+        }
+
+    elif doc_type == "finance":
+        risk_data = analyze_finance_risk(source)
+        return {
+            "document_type": "Finance",
+            "risk_analysis": risk_data
+        }
+
+    return None
+
+
+def analyze_document(document, doc_type=None):
+    if not document.text.strip():
+        return {"error": "No readable text found in the PDF."}, 400
+
+    if doc_type is None:
+        doc_type = identify_document_type(document.text)
+
+    payload = _risk_payload(document, doc_type)
+    if payload is None:
+        return {"error": "Unable to determine document type."}, 400
+    return payload, 200
+
+
+def analyze_pdf(pdf_file, margin=CLASSIFICATION_MARGIN, max_pages=CLASSIFICATION_MAX_PAGES, extraction=None):
+    # The pages after classification go straight to the analyzer, which
+    # scores and gathers evidence page by page without joining the document.
+    try:
+        pages = iter_pages(pdf_file, **(extraction or {}))
+        doc_type, read = classify_pages(pages, margin, max_pages)
+        document = _PageTracker(itertools.chain(read, pages))
+        payload = _risk_payload(document, doc_type)
+        if payload is None:
+            # No analyzer read the remaining pages; look for any text in them.
+            next((page for page in document if page.strip()), None)
+    except pdf_errors() as e:
+        print("Error reading PDF:", e)
+        return analyze_document(ExtractedDocument([]))
+
+    if not document.has_text:
+        return {"error": "No readable text found in the PDF."}, 400
+    if payload is None:
+        return {"error": "Unable to determine document type."}, 400
+    return payload, 200
+
+
+def analyze_pdf_bytes(content, margin=CLASSIFICATION_MARGIN, max_pages=CLASSIFICATION_MAX_PAGES, extraction=None):
+    # Entry point for batch worker processes; keep it free of Django imports
+    # so spawned workers start without configuring settings.
+    return analyze_pdf(io.BytesIO(content), margin, max_pages, extraction)
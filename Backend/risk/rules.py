@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .utils import KeywordMatcher
+
+DEFAULT_RULESET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rulesets")
+DEFAULT_CHECK_INTERVAL = 5
+RULESET_EXTENSIONS = (".json", ".yaml", ".yml")
+
+_config = {"directory": DEFAULT_RULESET_DIR, "check_interval": DEFAULT_CHECK_INTERVAL}
+_rulesets = {}
+_signature = None
+_last_check = 0.0
+_reload_requested = False
+_lock = threading.Lock()
+
+
+class RulesetError(ValueError):
+    pass
+
+
+class Ruleset:
+    """A keyword/weight table compiled into its matcher and risk limits."""
+
+    def __init__(self, data, source=None):
+        try:
+            self.name = data["name"]
+            self.version = str(data["version"])
+            categories = data["categories"]
+            self.keywords = {category: list(rule["keywords"]) for category, rule in categories.items()}
+            self.weights = {category: rule.get("weight", 1) for category, rule in categories.items()}
+        except (KeyError, TypeError, AttributeError) as e:
+            raise RulesetError(f"Invalid ruleset {source or data!r}: missing or malformed {e}") from e
+        if not self.keywords:
+            raise RulesetError(f"Ruleset {self.name!r} has no categories.")
+
+        self.source = source
+        self.ignore_case = data.get("ignore_case", False)
+        self.low_risk_limit = data.get("low_risk_limit", 30)
+        self.moderate_risk_limit = data.get("moderate_risk_limit", 60)
+
+        average_weight = sum(self.weights.values()) / len(self.weights)
+        expected_keyword_matches = data.get("expected_keyword_matches", 5)
+        self.risk_threshold = data.get(
+            "risk_threshold", int(len(self.weights) * average_weight * expected_keyword_matches)
+        )
+
+        self.matcher = KeywordMatcher(self.keywords, ignore_case=self.ignore_case)
+        self.fingerprint = hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()[:16]
+
+    def risk_level(self, risk_percentage):
+        if risk_percentage <= self.low_risk_limit:
+            return "Low Risk"
+        elif risk_percentage <= self.moderate_risk_limit:
+            return "Moderate Risk"
+        return "High Risk"
+
+
+def _read_file(path):
+    with open(path, "r", encoding="utf-8") as ruleset_file:
+        if path.endswith(".json"):
+            return json.load(ruleset_file)
+        try:
+            import yaml
+        except ImportError as e:
+            raise RulesetError(f"PyYAML is required to load {path}") from e
+        return yaml.safe_load(ruleset_file)
+
+
+def _ruleset_paths(directory):
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.endswith(RULESET_EXTENSIONS)
+    )
+
+
+def _directory_signature(directory):
+    signature = []
+    for path in _ruleset_paths(directory):
+        stat = os.stat(path)
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def load_rulesets(directory=None):
+    """Reads and compiles every ruleset file in ``directory``.
+
+    Raises ``RulesetError`` without side effects if any file is invalid.
+    """
+    directory = directory or _config["directory"]
+    rulesets = {}
+    for path in _ruleset_paths(directory):
+        try:
+            data = _read_file(path)
+        except ValueError as e:
+            raise RulesetError(f"Could not parse {path}: {e}") from e
+        ruleset = Ruleset(data, source=path)
+        if ruleset.name in rulesets:
+            raise RulesetError(f"Ruleset {ruleset.name!r} is defined in more than one file.")
+        rulesets[ruleset.name] = ruleset
+    return rulesets
+
+
+def reload_rulesets():
+    global _rulesets, _signature, _last_check, _reload_requested
+    with _lock:
+        # Cleared before reading, so a request made while the files are being
+        # read triggers another reload.
+        _reload_requested = False
+        directory = _config["directory"]
+        signature = _directory_signature(directory)
+        _rulesets = load_rulesets(directory)
+        _signature = signature
+        _last_check = time.monotonic()
+        return {name: ruleset.version for name, ruleset in _rulesets.items()}
+
+
+def request_reload():
+    """Makes the next ruleset lookup reload the files.
+
+    Safe to call from a signal handler: it takes no lock, so it cannot wait
+    on a reload the interrupted thread is already running.
+    """
+    global _reload_requested
+    _reload_requested = True
+
+
+def _refresh():
+    global _last_check
+    if (
+        _rulesets
+        and _signature is not None
+        and not _reload_requested
+        and time.monotonic() - _last_check < _config["check_interval"]
+    ):
+        return
+    try:
+        signature = _directory_signature(_config["directory"])
+    except OSError:
+        signature = _signature
+    if signature != _signature or not _rulesets or _reload_requested:
+        try:
+            reload_rulesets()
+        except (RulesetError, OSError) as e:
+            if not _rulesets:
+                raise
+            # Keep serving the last good rulesets until the files are fixed.
+            print("Error reloading risk rulesets:", e)
+            _last_check = time.monotonic()
+    else:
+        _last_check = time.monotonic()
+
+
+def configure(directory=None, check_interval=None):
+    global _signature
+    with _lock:
+        if directory is not None and directory != _config["directory"]:
+            _config["directory"] = directory
+            _signature = None
+        if check_interval is not None:
+            _config["check_interval"] = check_interval
+
+
+def current_config():
+    return dict(_config)
+
+
+def get_ruleset(name):
+    _refresh()
+    try:
+        return _rulesets[name]
+    except KeyError:
+        raise RulesetError(f"No risk ruleset named {name!r} in {_config['directory']}") from None
+
+
+def rulesets_fingerprint():
+    _refresh()
+    rulesets = _rulesets
+    combined = "".join(f"{name}:{rulesets[name].fingerprint};" for name in sorted(rulesets))
+    return hashlib.sha256(combined.encode()).hexdigest()[:16]
@@ -0,0 +1,35 @@
+import io
+
+from django.conf import settings
+
+from documents.extraction import extraction_options
+from .cache import get_result_cache, result_cache_key
+from .pipeline import CLASSIFICATION_MARGIN, CLASSIFICATION_MAX_PAGES, analyze_pdf
+
+
+def classification_options():
+    return {
+        "margin": getattr(settings, "RISK_CLASSIFICATION_MARGIN", CLASSIFICATION_MARGIN),
+        "max_pages": getattr(settings, "RISK_CLASSIFICATION_MAX_PAGES", CLASSIFICATION_MAX_PAGES),
+        "extraction": extraction_options("risk"),
+    }
+
+
+def analyze_upload(content):
+    cache = get_result_cache()
+    cache_key = result_cache_key(content)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached["payload"], cached["status"]
+
+    payload, status = analyze_pdf(io.BytesIO(content), **classification_options())
+
+    cache.set(cache_key, {"payload": payload, "status": status})
+    return payload, status
+
+
+def run_analysis_job(job, progress):
+    with open(job.input_path, "rb") as pdf_file:
+        content = pdf_file.read()
+    progress(0.1, "analyzing")
+    return analyze_upload(content)
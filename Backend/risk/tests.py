@@ -1,3 +1,207 @@
-from django.test import TestCase
+import io
+import random
+import re
+import zipfile
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase
+
+from documents.extraction import ExtractedDocument, text_segments
+
+from . import construction, finance, realEstate
+from .batch import BatchTooLarge, collect_batch_files
+from .rules import get_ruleset
+from .utils import KeywordMatcher, SentenceIndex, StreamingSentenceIndex
+
+
+def legacy_count(text, keywords, ignore_case=False):
+    # The per-keyword scoring the analyzers used before KeywordMatcher.
+    flags = re.IGNORECASE if ignore_case else 0
+    return sum(len(re.findall(r"\b" + re.escape(keyword) + r"\b", text, flags)) for keyword in keywords)
+
+
+def legacy_substring_evidence(text, keywords, separator):
+    # Real estate and construction: ``keyword in sentence``.
+    sentences = re.split(separator, text)
+    return [sentence.strip() for sentence in sentences if any(keyword in sentence for keyword in keywords)][:3]
+
+
+def legacy_word_evidence(text, keywords, separator):
+    # Finance: a case-insensitive whole-word search per sentence.
+    matched = []
+    for sentence in re.split(separator, text):
+        if any(re.search(r"\b" + re.escape(keyword) + r"\b", sentence, re.IGNORECASE) for keyword in keywords):
+            matched.append(sentence.strip())
+    return matched[:3]
+
+
+def legacy_evidence(text, keywords, separator, substring_evidence):
+    if substring_evidence:
+        return legacy_substring_evidence(text, keywords, separator)
+    return legacy_word_evidence(text, keywords, separator)
+
+
+def random_pages(rng, keywords, page_count=4, mixed_case=False):
+    filler = ["the", "party", "e.g.", "mr.", "Dr.", "u.s.", "x", "?", "!", "...", "\t", "\n", "underscore_"]
+    separators = [" ", "", " ", ". ", ".", " \n", "? "]
+    pages = []
+    for _ in range(page_count):
+        words = []
+        for _ in range(rng.randint(0, 40)):
+            word = rng.choice(keywords) if rng.random() < 0.3 else rng.choice(filler)
+            if mixed_case and rng.random() < 0.3:
+                word = word.upper() if rng.random() < 0.5 else word.title()
+            words.append(word + rng.choice(separators))
+        page = "".join(words)
+        pages.append(page if mixed_case else page.lower())
+    return pages
+
+
+RULESET_NAMES = (realEstate.RULESET_NAME, construction.RULESET_NAME, finance.RULESET_NAME)
+
+# name -> (sentence separator, whether substrings count as evidence)
+EVIDENCE_RULES = {
+    realEstate.RULESET_NAME: (realEstate.SENTENCE_BOUNDARY, True),
+    construction.RULESET_NAME: (construction.SENTENCE_BOUNDARY, True),
+    finance.RULESET_NAME: (finance.SENTENCE_BOUNDARY, False),
+}
+
+
+class KeywordMatcherTests(SimpleTestCase):
+    def assert_counts_match_legacy(self, matcher, categories, text, ignore_case=False):
+        counts = matcher.count(text)
+        for category, keywords in categories.items():
+            self.assertEqual(counts[category], legacy_count(text, keywords, ignore_case), category)
+
+    def test_shared_prefixes_and_shared_keywords(self):
+        categories = {
+            "Interest": ["interest", "interest rate", "interest rate cap"],
+            "Rates": ["rate", "rate cut", "interest rate"],
+        }
+        text = "the interest rate cap, interest rates, an interest-rate cut, a rate cut and rated rate."
+        self.assert_counts_match_legacy(KeywordMatcher(categories), categories, text)
+
+    def test_overlapping_occurrences_are_not_double_counted(self):
+        categories = {"Pairs": ["a a", "b b b"], "Single": ["a"]}
+        for text in ("a a a", "a a a a", "b b b b b", "a a, a a"):
+            self.assert_counts_match_legacy(KeywordMatcher(categories), categories, text)
+
+    def test_keywords_inside_longer_words_do_not_score(self):
+        categories = {"Tenant": ["tenant"], "Repair": ["repair"]}
+        text = "tenants, subtenant, tenant_id, repairs and repair."
+        self.assertEqual(KeywordMatcher(categories).count(text), {"Tenant": 0, "Repair": 1})
+
+    def test_finance_ignores_case(self):
+        ruleset = get_ruleset(finance.RULESET_NAME)
+        self.assertTrue(ruleset.ignore_case)
+        text = "The EMI and Interest Rate are Fixed. A Prepayment PENALTY applies on Default? emi schedule."
+        self.assert_counts_match_legacy(ruleset.matcher, ruleset.keywords, text, ignore_case=True)
+
+    def test_rulesets_match_legacy_scoring(self):
+        rng = random.Random(0)
+        for name in RULESET_NAMES:
+            ruleset = get_ruleset(name)
+            keywords = [keyword for words in ruleset.keywords.values() for keyword in words]
+            for _ in range(50):
+                text = ExtractedDocument(random_pages(rng, keywords, mixed_case=ruleset.ignore_case)).text
+                self.assert_counts_match_legacy(ruleset.matcher, ruleset.keywords, text, ruleset.ignore_case)
+
+
+class SentenceIndexTests(SimpleTestCase):
+    def test_substring_evidence_without_a_scored_hit(self):
+        matcher = KeywordMatcher({"Tenant": ["tenant"]})
+        text = "The subtenants agreed. Nothing here! A tenant left?"
+        sentences = SentenceIndex(text, realEstate.SENTENCE_BOUNDARY)
+        self.assertEqual(matcher.count(text, sentences, substring_evidence=True), {"Tenant": 1})
+        self.assertEqual(sentences.lookup("Tenant"), ["The subtenants agreed.", "A tenant left?"])
+
+    def test_rulesets_match_legacy_evidence(self):
+        rng = random.Random(0)
+        for name, (separator, substring_evidence) in EVIDENCE_RULES.items():
+            ruleset = get_ruleset(name)
+            keywords = [keyword for words in ruleset.keywords.values() for keyword in words]
+            for _ in range(50):
+                text = ExtractedDocument(random_pages(rng, keywords, mixed_case=ruleset.ignore_case)).text
+                sentences = SentenceIndex(text, separator)
+                ruleset.matcher.count(text, sentences, substring_evidence=substring_evidence)
+                for category, category_keywords in ruleset.keywords.items():
+                    expected = legacy_evidence(text, category_keywords, separator, substring_evidence)
+                    self.assertEqual(sentences.lookup(category, 3), expected, (name, category, text))
+
+
+class StreamingSentenceIndexTests(SimpleTestCase):
+    def test_separator_split_across_segments(self):
+        matcher = KeywordMatcher({"Lease": ["lease"]})
+        segments = ["the lease ends.", "  ", "no lease? ", "none. ", "a lease"]
+        streamed = StreamingSentenceIndex(realEstate.SENTENCE_BOUNDARY)
+        matcher.count_segments(segments, streamed)
+        self.assertEqual(streamed.lookup("Lease"), ["the lease ends.", "no lease?", "a lease"])
+
+    def test_only_sentences_with_hits_are_kept(self):
+        matcher = KeywordMatcher({"Lease": ["lease"]})
+        streamed = StreamingSentenceIndex(realEstate.SENTENCE_BOUNDARY)
+        matcher.count_segments(["filler. " * 100, "the lease. ", "filler. " * 100], streamed)
+        self.assertEqual(list(streamed.sentences.values()), ["the lease."])
+
+    def test_pages_match_whole_text(self):
+        rng = random.Random(1)
+        for name, (separator, substring_evidence) in EVIDENCE_RULES.items():
+            ruleset = get_ruleset(name)
+            keywords = [keyword for words in ruleset.keywords.values() for keyword in words]
+            for _ in range(50):
+                pages = random_pages(rng, keywords, mixed_case=ruleset.ignore_case)
+                text = ExtractedDocument(pages).text
+                sentences = SentenceIndex(text, separator)
+                counts = ruleset.matcher.count(text, sentences, substring_evidence=substring_evidence)
+                streamed = StreamingSentenceIndex(separator)
+                streamed_counts = ruleset.matcher.count_segments(
+                    text_segments(pages), streamed, substring_evidence=substring_evidence
+                )
+                self.assertEqual(streamed_counts, counts)
+                for category in ruleset.keywords:
+                    self.assertEqual(streamed.lookup(category, 3), sentences.lookup(category, 3), (name, pages))
+
+
+class AnalyzerTests(SimpleTestCase):
+    def test_page_stream_matches_extracted_document(self):
+        analyzers = {
+            realEstate.RULESET_NAME: realEstate.analyze_real_estate_risk,
+            construction.RULESET_NAME: construction.analyze_construction_risk,
+            finance.RULESET_NAME: finance.analyze_finance_risk,
+        }
+        rng = random.Random(2)
+        for name, analyze in analyzers.items():
+            keywords = [keyword for words in get_ruleset(name).keywords.values() for keyword in words]
+            pages = random_pages(rng, keywords, page_count=6)
+            self.assertEqual(analyze(iter(pages)), analyze(ExtractedDocument(pages)), name)
+
+
+class CollectBatchFilesTests(SimpleTestCase):
+    def zip_upload(self, name, members):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            for member_name, content in members.items():
+                zip_file.writestr(member_name, content)
+        return SimpleUploadedFile(name, archive.getvalue())
+
+    def test_only_pdfs_are_collected(self):
+        uploads = [
+            SimpleUploadedFile("lease.PDF", b"%PDF lease"),
+            SimpleUploadedFile("notes.txt", b"not a pdf"),
+            self.zip_upload("batch.zip", {"a.pdf": b"%PDF a", "readme.md": b"skip", "dir/b.pdf": b"%PDF b"}),
+        ]
+        self.assertEqual(
+            list(collect_batch_files(uploads)),
+            [("lease.PDF", b"%PDF lease"), ("a.pdf", b"%PDF a"), ("dir/b.pdf", b"%PDF b")],
+        )
+
+    def test_limits_are_checked_before_decompressing(self):
+        bomb = self.zip_upload("bomb.zip", {"big.pdf": b"\0" * (1 << 20)})
+        with self.assertRaises(BatchTooLarge):
+            list(collect_batch_files([bomb], max_file_bytes=1024))
+
+        uploads = [SimpleUploadedFile(f"{index}.pdf", b"%PDF") for index in range(3)]
+        with self.assertRaises(BatchTooLarge):
+            list(collect_batch_files(uploads, max_files=2))
+        with self.assertRaises(BatchTooLarge):
+            list(collect_batch_files(uploads, max_bytes=10))
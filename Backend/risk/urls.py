@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import analyze_uploaded_document
+from .views import analyze_uploaded_document, analyze_uploaded_batch
 
 urlpatterns = [
     path('analyze/', analyze_uploaded_document),
+    path('analyze-batch/', analyze_uploaded_batch),
 ]
\ No newline at end of file
@@ -0,0 +1,240 @@
+import bisect
+import re
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+def _is_boundary(text, index):
+    before = index > 0 and _is_word_char(text[index - 1])
+    after = index < len(text) and _is_word_char(text[index])
+    return before != after
+
+
+def _trie_pattern(node):
+    # Turns the keyword trie into a nested regex so the engine rejects a
+    # position after looking at a single character instead of trying every
+    # keyword in turn.
+    branches = []
+    for char in sorted(key for key in node if key is not None):
+        child = node[char]
+        branches.append(re.escape(char) + _trie_pattern(child))
+    if not branches:
+        return ""
+    optional = None in node
+    if len(branches) == 1 and not optional:
+        return branches[0]
+    pattern = "(?:" + "|".join(branches) + ")"
+    return pattern + "?" if optional else pattern
+
+
+class KeywordMatcher:
+    """Counts every keyword of every category in one pass over the text.
+
+    Keywords keep the ``\\b<keyword>\\b`` semantics of the per-keyword
+    ``re.findall`` calls this replaces, including keywords that appear in
+    more than one category and keywords that share a prefix.
+    """
+
+    def __init__(self, categories, ignore_case=False):
+        self.categories = list(categories)
+        self.ignore_case = ignore_case
+        self.keyword_categories = {}
+        self._trie = {}
+
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                if ignore_case:
+                    keyword = keyword.lower()
+                self.keyword_categories.setdefault(keyword, []).append(category)
+
+        for keyword in self.keyword_categories:
+            node = self._trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[None] = keyword
+
+        pattern = _trie_pattern(self._trie)
+        self._word_candidates = re.compile(r"\b(?=" + pattern + ")") if self._trie else None
+        self._substring_candidates = re.compile("(?=" + pattern + ")") if self._trie else None
+
+    def scan(self, text, substrings=False):
+        """Yields ``(start, end, keyword, whole_word)`` for every keyword hit.
+
+        Only whole-word hits are produced unless ``substrings`` is set, in
+        which case every occurrence is reported and ``whole_word`` tells them
+        apart. Expects text already lower-cased when ``ignore_case`` is set.
+        """
+        candidates = self._substring_candidates if substrings else self._word_candidates
+        if candidates is None:
+            return
+
+        for match in candidates.finditer(text):
+            start = match.start()
+            starts_word = not substrings or _is_boundary(text, start)
+            node = self._trie
+            index = start
+            while True:
+                keyword = node.get(None)
+                if keyword is not None:
+                    whole_word = starts_word and _is_boundary(text, index)
+                    if whole_word or substrings:
+                        yield start, index, keyword, whole_word
+                if index >= len(text):
+                    break
+                node = node.get(text[index])
+                if node is None:
+                    break
+                index += 1
+
+    def find_keywords(self, text):
+        """Yields ``(start, end, keyword)`` for every whole-word keyword hit."""
+        if self.ignore_case:
+            text = text.lower()
+
+        last_end = {}
+        for start, end, keyword, _ in self.scan(text):
+            if last_end.get(keyword, 0) <= start:
+                last_end[keyword] = end
+                yield start, end, keyword
+
+    def count(self, text, sentences=None, substring_evidence=False):
+        """Returns hit counts per category.
+
+        When a ``SentenceIndex`` is given it is filled with the sentences
+        each category matched in the same pass. ``substring_evidence`` makes
+        a keyword found inside a longer word count as evidence (but not as a
+        scored hit), as the old ``keyword in sentence`` checks did.
+        """
+        if self.ignore_case:
+            text = text.lower()
+
+        counts = {category: 0 for category in self.categories}
+        self._count_into(counts, text, 0, sentences, substring_evidence)
+        return counts
+
+    def count_segments(self, segments, sentences=None, substring_evidence=False):
+        """``count`` over text arriving in pieces, such as one per PDF page.
+
+        Gives the same result as ``count("".join(segments))`` as long as no
+        keyword spans two segments; newline-terminated pages guarantee that,
+        since keywords never contain a newline. ``sentences`` should be a
+        ``StreamingSentenceIndex``; it is closed at the end.
+        """
+        counts = {category: 0 for category in self.categories}
+        offset = 0
+        for segment in segments:
+            text = segment.lower() if self.ignore_case else segment
+            self._count_into(counts, text, offset, sentences, substring_evidence)
+            if sentences is not None:
+                sentences.feed(segment)
+            offset += len(segment)
+        if sentences is not None:
+            sentences.close()
+        return counts
+
+    def _count_into(self, counts, text, offset, sentences, substring_evidence):
+        last_end = {}
+        for start, end, keyword, whole_word in self.scan(text, substrings=substring_evidence):
+            categories = self.keyword_categories[keyword]
+            if sentences is not None:
+                for category in categories:
+                    sentences.add(category, offset + start)
+            if whole_word and last_end.get(keyword, 0) <= start:
+                last_end[keyword] = end
+                for category in categories:
+                    counts[category] += 1
+
+
+class SentenceIndex:
+    """Splits text into sentences once and records which categories hit each.
+
+    Sentences are the pieces ``re.split(separator, text)`` would return;
+    evidence lookups return them stripped, in document order.
+    """
+
+    def __init__(self, text, separator):
+        self.sentences = []
+        self.starts = []
+        self.postings = {}
+
+        position = 0
+        for match in re.finditer(separator, text):
+            self.starts.append(position)
+            self.sentences.append(text[position:match.start()])
+            position = match.end()
+        self.starts.append(position)
+        self.sentences.append(text[position:])
+
+    def add(self, category, offset):
+        sentence_id = bisect.bisect_right(self.starts, offset) - 1
+        self.postings.setdefault(category, set()).add(sentence_id)
+
+    def lookup(self, category, limit=None):
+        sentence_ids = sorted(self.postings.get(category, ()))[:limit]
+        return [self.sentences[sentence_id].strip() for sentence_id in sentence_ids]
+
+
+class StreamingSentenceIndex:
+    """A ``SentenceIndex`` built from text fed in pieces.
+
+    Only sentences that a category hit are kept, so memory is bounded by the
+    evidence and the sentence being read rather than by the document.
+    Hits must be added before the text containing them is fed; lookups give
+    the same sentences as ``SentenceIndex`` over the joined text.
+    """
+
+    # Characters kept before the current sentence so that the separator's
+    # lookbehind sees the same text it would in the whole document.
+    CONTEXT = 16
+
+    def __init__(self, separator):
+        self.separator = re.compile(separator)
+        self.sentences = {}
+        self.postings = {}
+        self._buffer = ""
+        self._buffer_offset = 0
+        self._position = 0
+        self._sentence_id = 0
+        self._pending = []
+
+    def add(self, category, offset):
+        self._pending.append((offset, category))
+
+    def feed(self, text):
+        self._buffer += text
+        for match in self.separator.finditer(self._buffer, self._position):
+            # A separator that reaches the end of what has been read so far
+            # might continue in the next piece.
+            if match.end() >= len(self._buffer):
+                break
+            self._finish(match.start(), match.end())
+
+        cut = max(0, self._position - self.CONTEXT)
+        if cut:
+            self._buffer = self._buffer[cut:]
+            self._buffer_offset += cut
+            self._position -= cut
+
+    def close(self):
+        end = len(self._buffer)
+        self._finish(end, end)
+        self._buffer = ""
+
+    def _finish(self, sentence_end, next_start):
+        next_offset = self._buffer_offset + next_start
+        hits = 0
+        while hits < len(self._pending) and self._pending[hits][0] < next_offset:
+            hits += 1
+        if hits:
+            self.sentences[self._sentence_id] = self._buffer[self._position:sentence_end]
+            for _, category in self._pending[:hits]:
+                self.postings.setdefault(category, set()).add(self._sentence_id)
+            del self._pending[:hits]
+        self._sentence_id += 1
+        self._position = next_start
+
+    def lookup(self, category, limit=None):
+        sentence_ids = sorted(self.postings.get(category, ()))[:limit]
+        return [self.sentences[sentence_id].strip() for sentence_id in sentence_ids]
@@ -1,88 +1,57 @@
 # views.py
-import os
+import zipfile
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.core.files.storage import default_storage
 from django.conf import settings
 from rest_framework.decorators import api_view
-from django.views.decorators.csrf import csrf_exempt
-from .realEstate import  analyze_real_estate_risk
-from .construction import analyze_construction_risk
-from .finance import analyze_finance_risk
+from jobs.queue import enqueue_job, job_accepted_response, wants_async
+from documents.uploads import retain_uploaded_file
+from .pipeline import extract_document_from_pdf
+from .batch import BatchTooLarge, analyze_batch, collect_batch_files
+from .tasks import analyze_upload, classification_options
+
 
 @csrf_exempt
 @api_view(["POST"])
 def analyze_uploaded_document(request):
     if request.method == 'POST' and request.FILES.get('file'):
         uploaded_file = request.FILES['file']
-        file_path = default_storage.save('uploads/' + uploaded_file.name, uploaded_file)
-        full_path = os.path.join(settings.MEDIA_ROOT, file_path)
-
-        text = extract_text_from_pdf(full_path)
-
-        if not text.strip():
-            return JsonResponse({"error": "No readable text found in the PDF."}, status=400)
-
-        doc_type = identify_document_type(text)
-
-        if doc_type == "real_estate":
-            risk_data = analyze_real_estate_risk(full_path)
-            return JsonResponse({
-                "document_type": "Real Estate",
-                "risk_analysis": risk_data
-            })
+        retain_uploaded_file(uploaded_file)
 
-        elif doc_type == "construction":
-            details, score, percent, category = analyze_construction_risk(full_path)
-            return JsonResponse({
-                "document_type": "Construction",
-                "overall_score": score,
-                "risk_percentage": percent,
-                "risk_level": category,
-                "risk_details": details
-            })
+        if wants_async(request):
+            job = enqueue_job("risk.analyze", uploaded_file)
+            return job_accepted_response(request, job)
 
-        elif doc_type == "finance":
-            risk_data = analyze_finance_risk(full_path)
-            return JsonResponse({
-                "document_type": "Finance",
-                "risk_analysis": risk_data
-            })
-
-        else:
-            return JsonResponse({"error": "Unable to determine document type."}, status=400)
+        payload, status = analyze_upload(uploaded_file.read())
+        return JsonResponse(payload, status=status)
 
     return JsonResponse({"error": "Invalid request or file not found."}, status=400)
 
 
-def identify_document_type(text):
-    real_estate_keywords = ["allotment", "property", "real estate", "lease", "tenancy", "occupancy", "mortgage", "zoning"]
-    construction_keywords = ["contractor", "construction", "site", "permit", "engineering", "subcontractor", "cement", "material"]
-    finance_keywords = ["loan", "interest rate", "repayment", "collateral", "bank", "finance", "credit", "borrower"]
+@csrf_exempt
+@api_view(["POST"])
+def analyze_uploaded_batch(request):
+    uploaded_files = request.FILES.getlist('files') + request.FILES.getlist('file')
+    if not uploaded_files:
+        return JsonResponse({"error": "No files uploaded."}, status=400)
 
-    real_estate_hits = sum(1 for word in real_estate_keywords if word in text)
-    construction_hits = sum(1 for word in construction_keywords if word in text)
-    finance_hits = sum(1 for word in finance_keywords if word in text)
+    try:
+        files = list(collect_batch_files(
+            uploaded_files,
+            max_files=getattr(settings, "RISK_BATCH_MAX_FILES", 500),
+            max_bytes=getattr(settings, "RISK_BATCH_MAX_BYTES", None),
+            max_file_bytes=getattr(settings, "RISK_BATCH_MAX_FILE_BYTES", None),
+        ))
+    except zipfile.BadZipFile:
+        return JsonResponse({"error": "Uploaded archive is not a valid zip file."}, status=400)
+    except BatchTooLarge as e:
+        return JsonResponse({"error": str(e)}, status=413)
 
-    hits = {
-        "real_estate": real_estate_hits,
-        "construction": construction_hits,
-        "finance": finance_hits
-    }
+    if not files:
+        return JsonResponse({"error": "No PDF files found in the upload."}, status=400)
 
-    return max(hits, key=hits.get)
+    return JsonResponse(analyze_batch(files, **classification_options()))
 
 
 def extract_text_from_pdf(pdf_path):
-    try:
-        import pdfplumber
-        text = ""
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-        return text.lower()
-    except Exception as e:
-        print("Error reading PDF with pdfplumber:", e)
-        return ""
+    return extract_document_from_pdf(pdf_path).text
@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class SummaryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'summary'
+
+    def ready(self):
+        if getattr(settings, "SUMMARY_WARMUP_ON_START", False):
+            from .utils import start_warmup
+
+            # Load in the background so the worker can answer the readiness
+            # probe (503) instead of blocking its startup.
+            start_warmup()
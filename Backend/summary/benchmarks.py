@@ -0,0 +1,114 @@
+import difflib
+import os
+import platform
+import statistics
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from .utils import chunk_text, clean_text, extract_text_from_pdf, get_model, summarize_texts
+
+BASELINE_BACKEND = "torch"
+# Sampling would make every comparison noisy, so backends are compared on
+# greedy output.
+COMPARISON_GENERATION_KWARGS = {"max_length": 200, "num_beams": 1, "do_sample": False}
+CORPUS_EXTENSIONS = (".pdf", ".txt")
+
+
+def iter_corpus(directory, limit=None):
+    """Yields ``(name, text)`` for the PDFs and text files in ``directory``."""
+    names = sorted(name for name in os.listdir(directory) if name.lower().endswith(CORPUS_EXTENSIONS))
+    for name in names[:limit]:
+        path = os.path.join(directory, name)
+        if name.lower().endswith(".pdf"):
+            text = extract_text_from_pdf(path)
+        else:
+            with open(path, "r", encoding="utf-8") as text_file:
+                text = text_file.read()
+        yield name, text
+
+
+def word_f1(reference, candidate):
+    """Unigram overlap F1 between two summaries, in the spirit of ROUGE-1."""
+    reference_words = Counter(reference.lower().split())
+    candidate_words = Counter(candidate.lower().split())
+    overlap = sum((reference_words & candidate_words).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(candidate_words.values())
+    recall = overlap / sum(reference_words.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def sequence_similarity(reference, candidate):
+    return difflib.SequenceMatcher(None, reference.split(), candidate.split()).ratio()
+
+
+def _timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def compare_backends(corpus, backends, repeat=1, progress=None):
+    """Summarizes every document with each backend and scores it against fp32.
+
+    ``corpus`` is an iterable of ``(name, text)``. Per document, the report
+    has each backend's median latency and its similarity to the baseline
+    summaries.
+    """
+    backends = [BASELINE_BACKEND] + [backend for backend in backends if backend != BASELINE_BACKEND]
+    load_seconds = {}
+    for backend in backends:
+        load_seconds[backend], _ = _timed(get_model, backend)
+
+    results = []
+    for name, text in corpus:
+        chunks = chunk_text(clean_text(text))
+        result = {"document": name, "chunks": len(chunks), "backends": {}}
+        baseline = None
+        for backend in backends:
+            timings = []
+            for _ in range(repeat):
+                seconds, summaries = _timed(
+                    summarize_texts, chunks, backend=backend, generation_kwargs=COMPARISON_GENERATION_KWARGS
+                )
+                timings.append(seconds)
+            summary = " ".join(summaries)
+            if baseline is None:
+                baseline = summary
+            result["backends"][backend] = {
+                "seconds": statistics.median(timings),
+                "word_f1": word_f1(baseline, summary),
+                "sequence_similarity": sequence_similarity(baseline, summary),
+            }
+        results.append(result)
+        if progress:
+            progress(result)
+
+    summary_rows = {}
+    for backend in backends:
+        rows = [result["backends"][backend] for result in results]
+        if not rows:
+            continue
+        baseline_seconds = sum(result["backends"][BASELINE_BACKEND]["seconds"] for result in results)
+        backend_seconds = sum(row["seconds"] for row in rows)
+        summary_rows[backend] = {
+            "load_seconds": load_seconds[backend],
+            "total_seconds": backend_seconds,
+            "speedup": baseline_seconds / backend_seconds if backend_seconds else None,
+            "mean_word_f1": statistics.mean(row["word_f1"] for row in rows),
+            "mean_sequence_similarity": statistics.mean(row["sequence_similarity"] for row in rows),
+        }
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "generation": COMPARISON_GENERATION_KWARGS,
+        },
+        "backends": summary_rows,
+        "results": results,
+    }
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import SummaryCacheEntry
+from .utils import (
+    DETERMINISTIC_GENERATION_MODES,
+    GENERATION_MODES,
+    SUMMARY_MODEL_NAME,
+    generation_mode,
+    iter_summary_sections,
+    join_summary_sections,
+    plan_summary_chunks,
+    split_summary_sections,
+    summary_backend,
+    summary_mode,
+)
+
+
+def summary_cache_key(chunks, mode, generation):
+    """Hashes the planned chunks with everything else that shapes a summary.
+
+    Keying on the chunks rather than the whole text covers the chunk
+    overlap and the generate budget, which decide what gets summarized.
+    """
+    params = {
+        "model": SUMMARY_MODEL_NAME,
+        "backend": summary_backend(),
+        "generation": GENERATION_MODES[generation],
+        "mode": mode,
+        "batch_size": getattr(settings, "SUMMARY_BATCH_SIZE", 4),
+        "budget": getattr(settings, "SUMMARY_GENERATE_BUDGET", None),
+    }
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode())
+    for chunk in chunks:
+        digest.update(b"\0")
+        digest.update(chunk.encode())
+    return digest.hexdigest()
+
+
+def _evict(max_entries):
+    stale = SummaryCacheEntry.objects.order_by("-last_used").values_list("key", flat=True)[max_entries:]
+    stale = list(stale)
+    if stale:
+        SummaryCacheEntry.objects.filter(key__in=stale).delete()
+
+
+def iter_cached_summary_sections(cleaned_text, mode=None, generation=None, use_cache=True, chunks=None):
+    """``iter_summary_sections`` backed by the persistent summary cache.
+
+    Sampled summaries differ on every run and are never cached. The cache
+    keeps the ``SUMMARY_CACHE_MAX_ENTRIES`` most recently used entries.
+    ``chunks`` may pass in the result of ``plan_summary_chunks``.
+    """
+    mode = mode or summary_mode()
+    generation = generation_mode(generation)
+    max_entries = getattr(settings, "SUMMARY_CACHE_MAX_ENTRIES", 1000)
+    if not use_cache or not max_entries or generation not in DETERMINISTIC_GENERATION_MODES:
+        yield from iter_summary_sections(cleaned_text, mode, generation, chunks)
+        return
+
+    if chunks is None:
+        chunks = plan_summary_chunks(cleaned_text, mode)
+    key = summary_cache_key(chunks, mode, generation)
+    now = timezone.now()
+    if SummaryCacheEntry.objects.filter(key=key).update(last_used=now):
+        # Another process may evict the entry in between; then regenerate.
+        summary = SummaryCacheEntry.objects.filter(key=key).values_list("summary", flat=True).first()
+        if summary is not None:
+            yield from split_summary_sections(summary)
+            return
+
+    sections = []
+    for section in iter_summary_sections(cleaned_text, mode, generation, chunks):
+        sections.append(section)
+        yield section
+
+    SummaryCacheEntry.objects.update_or_create(
+        key=key, defaults={"summary": join_summary_sections(sections), "last_used": now}
+    )
+    _evict(max_entries)
+
+
+def cached_full_summary(cleaned_text, mode=None, generation=None, use_cache=True):
+    return join_summary_sections(iter_cached_summary_sections(cleaned_text, mode, generation, use_cache))
+
+
+def clear_summary_cache():
+    SummaryCacheEntry.objects.all().delete()
+
+
+def _user_key(user_name):
+    return hashlib.sha256(user_name.encode()).hexdigest()[:32]
+
+
+def _user_version(user_name):
+    # Invalidation moves the user to a new version instead of deleting keys;
+    # versions are timestamps so an evicted version key never brings back
+    # responses cached under an older one.
+    key = f"summary-docs-version:{_user_key(user_name)}"
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key, 0)
+    return version
+
+
+def cached_user_response(user_name, name, params, build):
+    """Returns ``build()``, cached per user until their documents change.
+
+    Uses the default Django cache for ``SUMMARY_LISTING_CACHE_TIMEOUT``
+    seconds; with several web processes that needs a shared cache backend
+    for invalidation to reach all of them.
+    """
+    timeout = getattr(settings, "SUMMARY_LISTING_CACHE_TIMEOUT", 60)
+    if not timeout:
+        return build()
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+    key = f"summary-docs:{_user_key(user_name)}:{_user_version(user_name)}:{name}:{digest}"
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, timeout)
+    return data
+
+
+def invalidate_user_documents(user_name):
+    if user_name is None:
+        return
+    cache.set(f"summary-docs-version:{_user_key(user_name)}", time.time_ns(), None)
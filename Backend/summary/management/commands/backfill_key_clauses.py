@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from summary.models import UploadedDocument
+from summary.pipeline import document_key_clauses
+
+
+class Command(BaseCommand):
+    requires_system_checks = []
+    help = (
+        "Extract and store the key clauses of documents uploaded before they "
+        "were saved with the document, so reads no longer parse the text."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=None, help="Backfill at most this many documents.")
+
+    def handle(self, *args, **options):
+        pending = UploadedDocument.objects.filter(encrypted_key_clauses="").order_by("id")
+        if options["limit"] is not None:
+            pending = pending[:options["limit"]]
+
+        done = 0
+        failed = 0
+        for doc in pending.iterator():
+            try:
+                document_key_clauses(doc)
+            except Exception as e:
+                self.stderr.write(f"Document {doc.id}: {e}")
+                failed += 1
+                continue
+            done += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Stored key clauses for {done} documents ({failed} failed)."))
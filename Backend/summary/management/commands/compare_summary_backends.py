@@ -0,0 +1,48 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from summary.benchmarks import compare_backends, iter_corpus
+from summary.utils import BACKENDS
+
+
+class Command(BaseCommand):
+    requires_system_checks = []
+    help = (
+        "Summarize a local corpus of PDFs and text files with each inference "
+        "backend and report latency and similarity to the fp32 torch baseline as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("corpus", help="Directory of .pdf and .txt documents.")
+        parser.add_argument("--backends", nargs="+", choices=sorted(BACKENDS), default=["torch-int8", "onnx"],
+                            help="Backends to compare with the torch baseline.")
+        parser.add_argument("--limit", type=int, default=None, help="Use at most this many documents.")
+        parser.add_argument("--repeat", type=int, default=1, help="Runs per document; the median is reported.")
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        if not os.path.isdir(options["corpus"]):
+            raise CommandError(f"{options['corpus']} is not a directory.")
+
+        def progress(result):
+            backends = ", ".join(
+                f"{backend} {row['seconds']:.2f}s f1 {row['word_f1']:.3f}" for backend, row in result["backends"].items()
+            )
+            self.stderr.write(f"{result['document']} ({result['chunks']} chunks): {backends}")
+
+        report = compare_backends(
+            iter_corpus(options["corpus"], options["limit"]),
+            options["backends"],
+            repeat=options["repeat"],
+            progress=progress,
+        )
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output_file:
+                output_file.write(output + "\n")
+            self.stderr.write(self.style.SUCCESS(f"Wrote {len(report['results'])} results to {options['output']}."))
+        else:
+            self.stdout.write(output)
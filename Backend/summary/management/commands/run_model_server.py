@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from summary.model_server import ModelServerError, serve
+
+
+class Command(BaseCommand):
+    requires_system_checks = []
+    help = (
+        "Load the summary models once and serve summarize, clean and key-clause "
+        "requests from every web worker over SUMMARY_MODEL_SERVER (a Unix socket "
+        "path or host:port), merging concurrent summaries into micro-batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--address", help="Unix socket path or host:port (default: SUMMARY_MODEL_SERVER).")
+        parser.add_argument("--max-batch", type=int, help="Most texts generated together (default: SUMMARY_MODEL_SERVER_MAX_BATCH).")
+        parser.add_argument("--max-wait", type=float,
+                            help="Seconds a request waits for others to batch with (default: SUMMARY_MODEL_SERVER_MAX_WAIT).")
+        parser.add_argument("--no-warmup", action="store_true", help="Load the models on the first request instead.")
+
+    def handle(self, *args, **options):
+        def ready(address):
+            self.stdout.write(self.style.SUCCESS(f"Model server listening on {address}"))
+
+        try:
+            serve(
+                options["address"],
+                max_batch=options["max_batch"],
+                max_wait=options["max_wait"],
+                warm=not options["no_warmup"],
+                ready=ready,
+            )
+        except ModelServerError as e:
+            raise CommandError(str(e))
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from summary.utils import warmup
+
+
+class Command(BaseCommand):
+    requires_system_checks = []
+    help = (
+        "Load the spaCy and BART models and run one dummy inference, e.g. to "
+        "populate the model cache when building an image or before taking traffic."
+    )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        loaded = warmup()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f"Models ready in {elapsed:.1f}s: {loaded}"))
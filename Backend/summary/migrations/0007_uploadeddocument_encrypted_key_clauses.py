@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('summary', '0006_remove_uploadeddocument_decrypted_preview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadeddocument',
+            name='encrypted_key_clauses',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('summary', '0007_uploadeddocument_encrypted_key_clauses'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SummaryCacheEntry',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('summary', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('summary', '0008_summarycacheentry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='uploadeddocument',
+            index=models.Index(fields=['user_name', 'upload_date', 'id'], name='summary_doc_user_date_idx'),
+        ),
+    ]
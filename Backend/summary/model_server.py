@@ -0,0 +1,238 @@
+import ipaddress
+import json
+import os
+import queue
+import threading
+import time
+from multiprocessing.connection import AuthenticationError, Client, Listener
+
+from django.conf import settings
+
+# Set in the server process so that its own calls into summary.utils run the
+# models instead of going back through the client.
+_serving = False
+
+
+class ModelServerError(RuntimeError):
+    pass
+
+
+def _check_loopback(host):
+    if host == "localhost":
+        return
+    try:
+        # multiprocessing.connection only speaks IPv4 for (host, port).
+        address = ipaddress.ip_address(host)
+        loopback = address.version == 4 and address.is_loopback
+    except ValueError:
+        loopback = False
+    if not loopback:
+        raise ModelServerError(
+            f"The model server only listens on a Unix socket or a loopback address, not {host!r}."
+        )
+
+
+def server_address(value=None):
+    """Parses ``SUMMARY_MODEL_SERVER``: a Unix socket path or ``host:port``.
+
+    Connections carry pickles, so TCP addresses must be on the loopback
+    interface.
+    """
+    value = value or getattr(settings, "SUMMARY_MODEL_SERVER", None)
+    if not value:
+        return None
+    if isinstance(value, (tuple, list)):
+        address = tuple(value)
+    else:
+        host, separator, port = value.rpartition(":")
+        if not (separator and port.isdigit() and not value.startswith("/")):
+            return value
+        address = host or "localhost", int(port)
+    _check_loopback(address[0])
+    return address
+
+
+def _authkey(address):
+    key = getattr(settings, "SUMMARY_MODEL_SERVER_AUTHKEY", None)
+    if not key:
+        if not isinstance(address, str):
+            raise ModelServerError("SUMMARY_MODEL_SERVER_AUTHKEY must be set to serve models over TCP.")
+        # A Unix socket is also protected by its file permissions.
+        key = settings.SECRET_KEY
+    return key.encode() if isinstance(key, str) else key
+
+
+class ModelServerClient:
+    """Sends one request per connection to a running ``run_model_server``."""
+
+    def __init__(self, address, authkey):
+        self.address = address
+        self.authkey = authkey
+
+    def request(self, op, **params):
+        with Client(self.address, authkey=self.authkey) as connection:
+            connection.send((op, params))
+            ok, result = connection.recv()
+        if not ok:
+            raise ModelServerError(result)
+        return result
+
+    def summarize(self, texts, generation_kwargs):
+        return self.request("summarize", texts=list(texts), generation_kwargs=generation_kwargs)
+
+
+def get_model_server_client():
+    """The client to use, or ``None`` when models should run in-process."""
+    if _serving:
+        return None
+    address = server_address()
+    return ModelServerClient(address, _authkey(address)) if address else None
+
+
+class _PendingSummaries:
+    __slots__ = ("texts", "generation_kwargs", "done", "result", "error")
+
+    def __init__(self, texts, generation_kwargs):
+        self.texts = texts
+        self.generation_kwargs = generation_kwargs
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Merges summarize requests that arrive close together into batches.
+
+    The first request waits at most ``max_wait`` seconds for others to join
+    it; a batch holds up to ``max_batch`` texts. Requests with different
+    generation arguments are generated separately.
+    """
+
+    def __init__(self, max_batch, max_wait):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+
+    def submit(self, texts, generation_kwargs):
+        pending = _PendingSummaries(texts, generation_kwargs)
+        self._queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def run(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0].texts)
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(pending)
+                size += len(pending.texts)
+            self._generate(batch)
+
+    def _generate(self, batch):
+        from .utils import summarize_texts
+
+        groups = {}
+        for pending in batch:
+            groups.setdefault(json.dumps(pending.generation_kwargs, sort_keys=True), []).append(pending)
+
+        for requests in groups.values():
+            texts = [text for pending in requests for text in pending.texts]
+            try:
+                summaries = summarize_texts(
+                    texts, batch_size=self.max_batch, generation_kwargs=requests[0].generation_kwargs
+                )
+            except Exception as e:
+                for pending in requests:
+                    pending.error = e
+                    pending.done.set()
+                continue
+
+            offset = 0
+            for pending in requests:
+                pending.result = summaries[offset:offset + len(pending.texts)]
+                offset += len(pending.texts)
+                pending.done.set()
+
+
+def _handle_connection(connection, handlers):
+    with connection:
+        try:
+            op, params = connection.recv()
+        except (EOFError, OSError):
+            return
+        handler = handlers.get(op)
+        if handler is None:
+            reply = False, f"Unknown model server operation {op!r}"
+        else:
+            try:
+                reply = True, handler(**params)
+            except Exception as e:
+                reply = False, f"{type(e).__name__}: {e}"
+        try:
+            connection.send(reply)
+        except OSError:
+            pass
+
+
+def serve(address=None, max_batch=None, max_wait=None, warm=True, ready=None):
+    """Runs the model server until interrupted.
+
+    Summaries go through a ``MicroBatcher``; spaCy requests are served one at
+    a time. ``ready`` is called with the listening address.
+    """
+    global _serving
+    _serving = True
+
+    from .utils import clean_text, extract_key_clauses, models_loaded, warmup
+
+    address = server_address(address)
+    if address is None:
+        raise ModelServerError("No model server address given and SUMMARY_MODEL_SERVER is not set.")
+    if warm:
+        warmup()
+
+    batcher = MicroBatcher(
+        max_batch or getattr(settings, "SUMMARY_MODEL_SERVER_MAX_BATCH", 8),
+        getattr(settings, "SUMMARY_MODEL_SERVER_MAX_WAIT", 0.02) if max_wait is None else max_wait,
+    )
+    threading.Thread(target=batcher.run, name="summary-batcher", daemon=True).start()
+
+    nlp_lock = threading.Lock()
+
+    def with_nlp(function):
+        def handler(**params):
+            with nlp_lock:
+                return function(**params)
+        return handler
+
+    handlers = {
+        "ping": models_loaded,
+        "summarize": batcher.submit,
+        "clean": with_nlp(clean_text),
+        "clauses": with_nlp(extract_key_clauses),
+    }
+
+    if isinstance(address, str) and os.path.exists(address):
+        os.unlink(address)
+    with Listener(address, authkey=_authkey(address)) as listener:
+        if isinstance(address, str):
+            os.chmod(address, 0o600)
+        if ready:
+            ready(listener.address)
+        while True:
+            try:
+                connection = listener.accept()
+            except (AuthenticationError, OSError) as e:
+                print("Model server rejected a connection:", e)
+                continue
+            threading.Thread(target=_handle_connection, args=(connection, handlers), daemon=True).start()
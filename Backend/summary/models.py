@@ -5,8 +5,26 @@ class UploadedDocument(models.Model):
     file_name = models.CharField(max_length=255)
     contract_type = models.CharField(max_length=100)
     encrypted_cleaned = models.TextField()
+    encrypted_key_clauses = models.TextField(blank=True, default="")
     summary = models.TextField(default="Hello")
     upload_date = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Serves the per-user listings newest first; id breaks ties for
+            # keyset pagination.
+            models.Index(fields=["user_name", "upload_date", "id"], name="summary_doc_user_date_idx"),
+        ]
+
     def __str__(self):
         return f"{self.file_name} - {self.contract_type}"
+
+
+class SummaryCacheEntry(models.Model):
+    key = models.CharField(max_length=64, primary_key=True)
+    summary = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.key
@@ -0,0 +1,106 @@
+from .cache import invalidate_user_documents, iter_cached_summary_sections
+from .models import UploadedDocument
+from .scheduler import admit_inference
+from .utils import (
+    iter_pdf_pages,
+    join_pages,
+    extract_contract_type,
+    clean_pages,
+    extract_key_clauses,
+    encrypt_text,
+    decrypt_text,
+    encrypt_key_clauses,
+    decrypt_key_clauses,
+    join_summary_sections,
+    plan_summary_chunks,
+    summary_mode,
+)
+
+
+def _noop_progress(fraction, stage):
+    pass
+
+
+def iter_upload_events(pdf_file, file_name, user_name, progress=_noop_progress):
+    """Processes an upload, yielding ``(event, data)`` as results become ready.
+
+    Contract type and key clauses come first as ``"document"``, then each
+    summary section as ``"section"``. The record is saved once the summary
+    is complete and the full payload is yielded as ``"done"``.
+    """
+    progress(0.0, "extracting and cleaning")
+    pages = []
+
+    def read_pages():
+        for page in iter_pdf_pages(pdf_file):
+            pages.append(page)
+            yield page
+
+    # Each batch of lines is cleaned as soon as its pages are extracted. The
+    # raw pages are still kept: key clauses are found in the whole raw text.
+    cleaned = clean_pages(read_pages())
+    extracted_text = join_pages(pages)
+    encrypted_cleaned = encrypt_text(cleaned)
+
+    progress(0.3, "extracting key clauses")
+    contract_type = extract_contract_type(cleaned)
+    key_clauses = extract_key_clauses(extracted_text)
+    yield "document", {"contract_type": contract_type, "keyClauses": key_clauses}
+
+    progress(0.4, "summarizing")
+    chunks = plan_summary_chunks(cleaned)
+    # Sections mode yields a section per chunk; hierarchical mode yields one.
+    expected = 1 if summary_mode() == "hierarchical" else max(1, len(chunks))
+    sections = []
+    for index, section in enumerate(iter_cached_summary_sections(cleaned, chunks=chunks), start=1):
+        sections.append(section)
+        progress(0.4 + 0.55 * min(index, expected) / expected, f"summarizing ({index}/{expected})")
+        yield "section", {"index": index, "section": section}
+    summary = join_summary_sections(sections)
+
+    progress(0.95, "saving")
+    doc = UploadedDocument.objects.create(
+        user_name=user_name,
+        file_name=file_name,
+        contract_type=contract_type,
+        encrypted_cleaned=encrypted_cleaned,
+        encrypted_key_clauses=encrypt_key_clauses(key_clauses),
+        summary=summary,
+    )
+    invalidate_user_documents(user_name)
+
+    yield "done", {
+        "summary": summary,
+        "keyClauses": key_clauses,
+        "contract_type": contract_type,
+        "document_id": doc.id
+    }
+
+
+def process_upload(pdf_file, file_name, user_name, progress=_noop_progress):
+    for event, data in iter_upload_events(pdf_file, file_name, user_name, progress):
+        if event == "done":
+            return data
+
+
+def document_key_clauses(doc):
+    """Returns the key clauses stored with ``doc``.
+
+    Documents uploaded before clauses were stored get them extracted from
+    their cleaned text once and saved.
+    """
+    if doc.encrypted_key_clauses:
+        return decrypt_key_clauses(doc.encrypted_key_clauses)
+
+    key_clauses = extract_key_clauses(decrypt_text(doc.encrypted_cleaned))
+    doc.encrypted_key_clauses = encrypt_key_clauses(key_clauses)
+    doc.save(update_fields=["encrypted_key_clauses"])
+    return key_clauses
+
+
+def run_extract_text_job(job, progress):
+    # Jobs share the host's inference slots with web requests but wait for
+    # one rather than being shed.
+    with open(job.input_path, "rb") as pdf_file, admit_inference(queue_timeout=None):
+        payload = process_upload(pdf_file, job.file_name, job.params.get("user_name"), progress)
+    return payload, 200
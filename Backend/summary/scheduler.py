@@ -0,0 +1,275 @@
+import math
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: the limit stays per process.
+    fcntl = None
+
+from django.conf import settings
+from django.http import JsonResponse
+
+_torch_threads_configured = False
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+class InferenceOverloaded(Exception):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def inference_concurrency():
+    return max(1, getattr(settings, "SUMMARY_INFERENCE_CONCURRENCY", 1))
+
+
+def host_slots_directory():
+    """Directory of the host-wide slot locks, or ``None`` if limits are per process."""
+    if fcntl is None:
+        return None
+    return getattr(
+        settings, "SUMMARY_INFERENCE_LOCK_DIR", os.path.join(tempfile.gettempdir(), "summary-inference-slots")
+    )
+
+
+def inference_processes():
+    """Processes whose inferences may run at the same time as this one's.
+
+    With host-wide slots only ``inference_concurrency()`` inferences run on
+    the host at once, whatever the number of processes.
+    """
+    if host_slots_directory():
+        return 1
+    return max(1, getattr(settings, "SUMMARY_INFERENCE_PROCESSES", None) or 1)
+
+
+def configure_torch_threads():
+    """Splits the cores between the inferences allowed to run at once.
+
+    torch's intra-op pool is process-wide, so this is set once per process.
+    """
+    global _torch_threads_configured
+    if _torch_threads_configured:
+        return
+    import torch
+
+    threads = getattr(settings, "SUMMARY_TORCH_THREADS", None)
+    if not threads:
+        threads = max(1, (os.cpu_count() or 1) // (inference_concurrency() * inference_processes()))
+    torch.set_num_threads(threads)
+    _torch_threads_configured = True
+
+
+class InferenceTimings:
+    def __init__(self):
+        self.queue_seconds = 0.0
+        self.compute_seconds = None
+
+    def server_timing(self):
+        metrics = [f"inference-queue;dur={self.queue_seconds * 1000:.1f}"]
+        if self.compute_seconds is not None:
+            metrics.append(f"inference;dur={self.compute_seconds * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+class HostSlots:
+    """Inference slots shared by every process on the host.
+
+    Slot ``i`` is held by whoever has an exclusive ``flock`` on
+    ``slot-<i>.lock`` in ``directory``. The kernel drops the lock when the
+    holder exits, so a crashed worker cannot leak its slot. The directory
+    must be on a local filesystem.
+    """
+
+    POLL_SECONDS = 0.05
+
+    def __init__(self, directory, count):
+        self.directory = directory
+        self.count = count
+        os.makedirs(directory, exist_ok=True)
+
+    def _try_acquire(self):
+        for index in range(self.count):
+            handle = open(os.path.join(self.directory, f"slot-{index}.lock"), "a")
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                handle.close()
+                continue
+            return handle
+        return None
+
+    def acquire(self, deadline=None):
+        """Returns a held slot, or ``None`` if ``deadline`` passes first."""
+        while True:
+            handle = self._try_acquire()
+            if handle is not None:
+                return handle
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(self.POLL_SECONDS)
+
+    def release(self, handle):
+        fcntl.flock(handle, fcntl.LOCK_UN)
+        handle.close()
+
+
+class InferenceScheduler:
+    """Admits at most ``max_concurrent`` inferences, with a bounded queue.
+
+    Callers beyond ``max_queue`` waiting ones, or that wait longer than
+    ``queue_timeout`` seconds, get ``InferenceOverloaded`` with a
+    Retry-After estimate from recent compute times. With ``host_slots``
+    an admitted caller also needs one of the host-wide slots, which other
+    web and job worker processes compete for.
+    """
+
+    def __init__(self, max_concurrent, max_queue, queue_timeout, host_slots=None):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.host_slots = host_slots
+        self.running = 0
+        self.waiting = 0
+        self.average_seconds = None
+        self._condition = threading.Condition()
+
+    def retry_after(self):
+        average = self.average_seconds or 1.0
+        backlog = self.waiting + self.running
+        return max(1, math.ceil(average * backlog / self.max_concurrent))
+
+    def acquire(self, queue_timeout=False):
+        """Waits for a free slot.
+
+        Returns the time spent waiting and the host-wide slot held, if any.
+        ``queue_timeout`` overrides the configured one; ``None`` waits as
+        long as it takes.
+        """
+        if queue_timeout is False:
+            queue_timeout = self.queue_timeout
+        start = time.monotonic()
+        with self._condition:
+            if self.running >= self.max_concurrent and self.waiting >= self.max_queue:
+                raise InferenceOverloaded("The summarizer is at capacity.", self.retry_after())
+            self.waiting += 1
+            try:
+                admitted = self._condition.wait_for(
+                    lambda: self.running < self.max_concurrent, timeout=queue_timeout
+                )
+            finally:
+                self.waiting -= 1
+            if not admitted:
+                raise InferenceOverloaded("Timed out waiting for the summarizer.", self.retry_after())
+            self.running += 1
+
+        host_slot = None
+        if self.host_slots is not None:
+            deadline = None if queue_timeout is None else start + queue_timeout
+            host_slot = self.host_slots.acquire(deadline)
+            if host_slot is None:
+                self.release()
+                raise InferenceOverloaded("Timed out waiting for the summarizer.", self.retry_after())
+        return time.monotonic() - start, host_slot
+
+    def release(self, compute_seconds=None, host_slot=None):
+        if host_slot is not None:
+            self.host_slots.release(host_slot)
+        with self._condition:
+            self.running -= 1
+            if compute_seconds is not None:
+                # Exponentially weighted, so Retry-After follows the current load.
+                if self.average_seconds is None:
+                    self.average_seconds = compute_seconds
+                else:
+                    self.average_seconds = 0.8 * self.average_seconds + 0.2 * compute_seconds
+            self._condition.notify()
+
+
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            directory = host_slots_directory()
+            _scheduler = InferenceScheduler(
+                inference_concurrency(),
+                getattr(settings, "SUMMARY_INFERENCE_QUEUE", 4),
+                getattr(settings, "SUMMARY_INFERENCE_QUEUE_TIMEOUT", 30),
+                HostSlots(directory, inference_concurrency()) if directory else None,
+            )
+        return _scheduler
+
+
+class InferenceSlot:
+    """One admitted inference; release it exactly once when the work ends."""
+
+    def __init__(self, scheduler, queue_seconds, host_slot=None):
+        self.scheduler = scheduler
+        self.host_slot = host_slot
+        self.timings = InferenceTimings()
+        self.timings.queue_seconds = queue_seconds
+        self._started = time.monotonic()
+        self._released = False
+        self._lock = threading.Lock()
+
+    def elapsed(self):
+        return time.monotonic() - self._started
+
+    def release(self):
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self.timings.compute_seconds = self.elapsed()
+        self.scheduler.release(self.timings.compute_seconds, self.host_slot)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+def admit_inference(queue_timeout=False):
+    """Returns an ``InferenceSlot``; raises ``InferenceOverloaded`` when full.
+
+    Job workers pass ``queue_timeout=None`` to wait for a slot instead of
+    being turned away.
+    """
+    scheduler = get_scheduler()
+    queue_seconds, host_slot = scheduler.acquire(queue_timeout)
+    return InferenceSlot(scheduler, queue_seconds, host_slot)
+
+
+def overloaded_response(error):
+    response = JsonResponse({"error": str(error), "retry_after": error.retry_after}, status=503)
+    response["Retry-After"] = str(error.retry_after)
+    return response
+
+
+class SlotHoldingStream:
+    """Streaming content that keeps an inference slot until it is consumed.
+
+    Django calls ``close`` when the response is finished, also when the
+    client went away before the stream started.
+    """
+
+    def __init__(self, iterable, slot):
+        self.iterable = iterable
+        self.slot = slot
+
+    def __iter__(self):
+        try:
+            yield from self.iterable
+        finally:
+            self.slot.release()
+
+    def close(self):
+        close = getattr(self.iterable, "close", None)
+        if close is not None:
+            close()
+        self.slot.release()
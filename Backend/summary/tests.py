@@ -1,3 +1,278 @@
-from django.test import TestCase
+import base64
+import json
+import random
+from datetime import datetime, timezone
+from unittest import mock
 
-# Create your tests here.
+from cryptography.exceptions import InvalidTag
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models.query import QuerySet
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from . import utils
+from .cache import iter_cached_summary_sections, summary_cache_key
+from .models import SummaryCacheEntry, UploadedDocument
+from .pipeline import iter_upload_events
+from .utils import (
+    ENVELOPE_PREFIX,
+    clean_pages,
+    clean_text,
+    decrypt_key_clauses,
+    decrypt_text,
+    encrypt_key_clauses,
+    encrypt_text,
+    encrypt_text_stream,
+    iter_page_lines,
+    join_pages,
+)
+
+ENCRYPTION_KEY = b"ThisIsASecretKey1234567890123415"
+
+# Written by the original AES-CBC encrypt_text (base64 of iv + ciphertext)
+# with ENCRYPTION_KEY, as found in rows stored before the GCM envelope.
+LEGACY_TEXT = (
+    "AAECAwQFBgcICQoLDA0OD39UxBzjyL8GiciJFl0PScH4hFNqrkWXShdjiSqN0gj/d0yvj70H"
+    "LJBNNXe8xumeBZjJtfdATtXxoiyH1uNhFF4="
+)
+LEGACY_KEY_CLAUSES = (
+    "EBESExQVFhcYGRobHB0eH5+xJFkvfCHdunGbnmcMlUjzab41batcxNl28iQm++Jk6MKDNxhI"
+    "QX55b73m0BKiwRYG4Ufcrsp7ie/gQbFKP5X5Rao3goRy9YdUgfJnAGjh"
+)
+
+
+@override_settings(AES_ENCRYPTION_KEY=ENCRYPTION_KEY)
+class EncryptionTests(SimpleTestCase):
+    def test_legacy_cbc_values_still_decrypt(self):
+        self.assertEqual(decrypt_text(LEGACY_TEXT), "the borrower shall repay the loan in monthly installments.")
+        self.assertEqual(
+            decrypt_key_clauses(LEGACY_KEY_CLAUSES),
+            {"Termination": "Either party may terminate on 30 days’ notice."},
+        )
+
+    def test_envelope_round_trip(self):
+        text = "Clause 1. The tenant shall pay rent.\n" * 200 + "été"
+        encrypted = encrypt_text(text)
+        self.assertTrue(encrypted.startswith(ENVELOPE_PREFIX))
+        self.assertEqual(decrypt_text(encrypted), text)
+        self.assertEqual(decrypt_text(encrypt_text("")), "")
+
+        clauses = {"Payment Terms": "Payment is due within 30 days."}
+        self.assertEqual(decrypt_key_clauses(encrypt_key_clauses(clauses)), clauses)
+
+    def test_stream_matches_joined_text(self):
+        pieces = ["first page\n", "", "second page\n"]
+        self.assertEqual(decrypt_text(encrypt_text_stream(pieces)), "".join(pieces))
+
+    def test_envelopes_use_fresh_nonces(self):
+        self.assertNotEqual(encrypt_text("same text"), encrypt_text("same text"))
+
+    def test_tampered_envelope_is_rejected(self):
+        sealed = bytearray(base64.b64decode(encrypt_text("the lease ends in May")[len(ENVELOPE_PREFIX):]))
+        sealed[14] ^= 1
+        with self.assertRaises(InvalidTag):
+            decrypt_text(ENVELOPE_PREFIX + base64.b64encode(bytes(sealed)).decode())
+
+
+class ListDocumentsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def create_documents(self, user_name, upload_dates):
+        ids = []
+        for index, upload_date in enumerate(upload_dates):
+            document = UploadedDocument.objects.create(
+                user_name=user_name, file_name=f"contract-{index}.pdf", contract_type="Lease", encrypted_cleaned=""
+            )
+            # upload_date is auto_now_add, so set it after creation.
+            UploadedDocument.objects.filter(id=document.id).update(upload_date=upload_date)
+            ids.append(document.id)
+        return ids
+
+    def fetch_all(self, user_name, limit):
+        ids = []
+        cursor = None
+        while True:
+            params = {"user_name": user_name, "limit": limit}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get("/summary/documents/", params)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            self.assertLessEqual(len(body["documents"]), limit)
+            ids += [document["id"] for document in body["documents"]]
+            cursor = body["next_cursor"]
+            if cursor is None:
+                return ids
+
+    def test_pages_cover_equal_upload_dates_once(self):
+        same = datetime(2025, 3, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+        earlier = datetime(2025, 2, 1, tzinfo=timezone.utc)
+        later = datetime(2025, 4, 1, tzinfo=timezone.utc)
+        ids = self.create_documents("alice", [same] * 5 + [earlier, later] + [same] * 2)
+        self.create_documents("bob", [same] * 3)
+
+        expected = list(
+            UploadedDocument.objects.filter(user_name="alice")
+            .order_by("-upload_date", "-id")
+            .values_list("id", flat=True)
+        )
+        self.assertEqual(sorted(expected), sorted(ids))
+
+        for limit in (1, 2, 3, 4, len(ids), len(ids) + 1):
+            self.assertEqual(self.fetch_all("alice", limit), expected, limit)
+
+    def test_rejects_invalid_cursor(self):
+        response = self.client.get("/summary/documents/", {"user_name": "alice", "cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_requires_user_name(self):
+        self.assertEqual(self.client.get("/summary/documents/").status_code, 400)
+
+
+class ReadinessTests(SimpleTestCase):
+    def test_first_probe_starts_warmup(self):
+        not_loaded = {"nlp": False, "tokenizer": False, "model": False}
+        with mock.patch("summary.views.models_loaded", return_value=not_loaded), \
+                mock.patch("summary.utils.warmup") as warmup:
+            response = self.client.get("/summary/ready/")
+            utils._warmup_thread.join()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json(), {"ready": False, "models": not_loaded})
+        warmup.assert_called_once_with()
+
+    def test_ready_once_models_are_loaded(self):
+        loaded = {"nlp": True, "tokenizer": True, "model": True}
+        with mock.patch("summary.views.models_loaded", return_value=loaded), \
+                mock.patch("summary.views.start_warmup") as start_warmup:
+            response = self.client.get("/summary/ready/")
+
+        self.assertEqual(response.status_code, 200)
+        start_warmup.assert_not_called()
+
+
+@override_settings(SUMMARY_MODE="sections", AES_ENCRYPTION_KEY=ENCRYPTION_KEY)
+class UploadProgressTests(TestCase):
+    def test_progress_advances_with_each_section(self):
+        reported = []
+        sections = [f"Summary Section {index}" for index in range(1, 5)]
+        with mock.patch("summary.pipeline.iter_pdf_pages", return_value=iter(["LEASE AGREEMENT", "text"])), \
+                mock.patch("summary.pipeline.clean_pages", side_effect=lambda pages: "\n".join(pages)), \
+                mock.patch("summary.pipeline.extract_key_clauses", return_value={}), \
+                mock.patch("summary.pipeline.plan_summary_chunks", return_value=["a", "b", "c", "d"]), \
+                mock.patch("summary.pipeline.iter_cached_summary_sections", return_value=iter(sections)):
+            events = list(iter_upload_events(None, "lease.pdf", "alice", lambda *update: reported.append(update)))
+
+        self.assertEqual([event for event, _ in events], ["document"] + ["section"] * 4 + ["done"])
+        summarizing = [fraction for fraction, stage in reported if stage.startswith("summarizing")]
+        self.assertEqual(summarizing[0], 0.4)
+        self.assertEqual(len(summarizing), 5)
+        self.assertEqual(summarizing, sorted(summarizing))
+        self.assertAlmostEqual(summarizing[-1], 0.95)
+
+
+class ExtractTextStreamTests(SimpleTestCase):
+    def test_done_event_carries_the_inference_time(self):
+        def upload_events(pdf_file, file_name, user_name):
+            yield "document", {"contract_type": "LEASE"}
+            yield "done", {"document_id": 1}
+
+        with mock.patch("summary.views.iter_upload_events", upload_events):
+            response = self.client.post(
+                "/summary/extract-text/stream/", {"file": SimpleUploadedFile("lease.pdf", b"%PDF")}
+            )
+            body = b"".join(response.streaming_content).decode()
+
+        self.assertNotIn("inference;", response["Server-Timing"])
+        events = [block.split("\n", 1) for block in body.strip().split("\n\n")]
+        self.assertEqual([name for name, _ in events], ["event: document", "event: done"])
+        done = json.loads(events[-1][1][len("data: "):])
+        self.assertEqual(done["document_id"], 1)
+        self.assertRegex(done["server_timing"], r"^inference-queue;dur=[0-9.]+, inference;dur=[0-9.]+$")
+
+
+@override_settings(SUMMARY_MODE="sections", SUMMARY_GENERATION="greedy", SUMMARY_CACHE_MAX_ENTRIES=10)
+class SummaryCacheTests(TestCase):
+    chunks = ["first chunk", "second chunk"]
+
+    def sections(self):
+        with mock.patch("summary.cache.iter_summary_sections", return_value=iter(["🔹 fresh 1", "🔹 fresh 2"])):
+            return list(iter_cached_summary_sections("text", chunks=self.chunks))
+
+    def test_hit_and_miss(self):
+        self.assertEqual(self.sections(), ["🔹 fresh 1", "🔹 fresh 2"])
+        key = summary_cache_key(self.chunks, "sections", "greedy")
+        SummaryCacheEntry.objects.filter(key=key).update(summary="🔹 cached 1\n\n🔹 cached 2")
+        self.assertEqual(self.sections(), ["🔹 cached 1", "🔹 cached 2"])
+
+    def test_entry_evicted_after_the_hit_is_regenerated(self):
+        key = summary_cache_key(self.chunks, "sections", "greedy")
+        SummaryCacheEntry.objects.create(key=key, summary="🔹 cached", last_used=datetime.now(timezone.utc))
+        update = QuerySet.update
+
+        def update_then_evict(queryset, **fields):
+            updated = update(queryset, **fields)
+            SummaryCacheEntry.objects.filter(key=key).delete()
+            return updated
+
+        with mock.patch.object(QuerySet, "update", update_then_evict):
+            self.assertEqual(self.sections(), ["🔹 fresh 1", "🔹 fresh 2"])
+        self.assertEqual(SummaryCacheEntry.objects.get(key=key).summary, "🔹 fresh 1\n\n🔹 fresh 2")
+
+
+class FakeToken:
+    def __init__(self, text):
+        self.text = text
+        self.is_stop = text in ("the", "of")
+        self.is_punct = text in (",", ".")
+
+
+class FakeNlp:
+    pipe_names = []
+
+    def __init__(self):
+        self.lines = []
+
+    def pipe(self, lines, batch_size, n_process, disable):
+        for line in lines:
+            self.lines.append(line)
+            yield [FakeToken(word) for word in line.split()]
+
+
+class CleanPagesTests(SimpleTestCase):
+    def random_pages(self, rng):
+        pieces = ["the", "lease", ",", ".", " ", "\n", "\n\n", "\t", "of", "rent"]
+        return ["".join(rng.choice(pieces) for _ in range(rng.randint(1, 12))) for _ in range(rng.randint(0, 5))]
+
+    def test_lines_match_the_joined_text(self):
+        rng = random.Random(0)
+        for _ in range(500):
+            pages = self.random_pages(rng)
+            text = join_pages(pages)
+            expected = [line.strip() for line in text.split("\n")] if text else []
+            self.assertEqual([line.strip() for line in iter_page_lines(pages)], expected, pages)
+
+    def test_cleaning_pages_matches_cleaning_the_text(self):
+        rng = random.Random(1)
+        with mock.patch("summary.utils.get_nlp", FakeNlp), \
+                mock.patch("summary.utils.get_model_server_client", return_value=None):
+            for _ in range(200):
+                pages = self.random_pages(rng)
+                self.assertEqual(clean_pages(iter(pages)), clean_text(join_pages(pages)), pages)
+
+    def test_pages_are_cleaned_while_they_are_read(self):
+        nlp = FakeNlp()
+        read = []
+
+        def pages():
+            for page in ("the lease", "of rent", "ends ."):
+                read.append(page)
+                yield page
+
+        with mock.patch("summary.utils.get_nlp", return_value=nlp), \
+                mock.patch("summary.utils.get_model_server_client", return_value=None):
+            cleaned = clean_pages(pages(), batch_size=1)
+
+        self.assertEqual(cleaned, "lease\n\nrent\n\nends")
+        self.assertEqual(nlp.lines, ["the lease", "", "of rent", "", "ends ."])
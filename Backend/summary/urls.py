@@ -1,10 +1,13 @@
 from django.urls import path
-from .views import hello_world, extract_text,get_recent_documents,get_document_summary,regenerate_summary
+from .views import hello_world, extract_text,get_recent_documents,get_document_summary,regenerate_summary,readiness,extract_text_stream,list_documents
 
 urlpatterns = [
     path('hello/', hello_world),  
+    path('ready/', readiness),
     path('extract-text/', extract_text),  
+    path('extract-text/stream/', extract_text_stream),
     path('recent-document/',get_recent_documents),
+    path('documents/', list_documents),
     path('document-summary/',get_document_summary),
     path('regenerate-summary/<int:document_id>/', regenerate_summary),
 
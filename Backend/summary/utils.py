@@ -1,17 +1,159 @@
-import pdfplumber
+import os
 import re
-import spacy
+import json
 import base64
-import torch
-from transformers import BartTokenizer, BartForConditionalGeneration
-from Crypto.Cipher import AES
-from Crypto.Util.Padding import pad, unpad
-from Crypto.Random import get_random_bytes
+import threading
+import zlib
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from documents.extraction import extraction_options, iter_raw_pages
+from .model_server import ModelServerError, get_model_server_client
+from .scheduler import configure_torch_threads
 
-nlp = spacy.load("en_core_web_sm")
-tokenizer = BartTokenizer.from_pretrained("facebook/bart-large-cnn")
-model = BartForConditionalGeneration.from_pretrained("facebook/bart-large-cnn")
+SPACY_MODEL_NAME = "en_core_web_sm"
+SUMMARY_MODEL_NAME = "facebook/bart-large-cnn"
+
+# spaCy, torch and transformers are imported on first use so that commands,
+# migrations and the risk app never pay for loading them.
+_models = {}
+_models_lock = threading.Lock()
+
+
+def _load_model(name, loader):
+    loaded = _models.get(name)
+    if loaded is None:
+        with _models_lock:
+            loaded = _models.get(name)
+            if loaded is None:
+                loaded = loader()
+                _models[name] = loaded
+    return loaded
+
+
+def _load_nlp():
+    import spacy
+    return spacy.load(SPACY_MODEL_NAME)
+
+
+def _load_tokenizer():
+    from transformers import BartTokenizerFast
+    return BartTokenizerFast.from_pretrained(SUMMARY_MODEL_NAME)
+
+
+def _load_torch_model():
+    from transformers import BartForConditionalGeneration
+    summary_model = BartForConditionalGeneration.from_pretrained(SUMMARY_MODEL_NAME)
+    summary_model.eval()
+    return summary_model
+
+
+def _load_quantized_model():
+    import torch
+    # Dynamic quantization stores the Linear weights as int8 and quantizes
+    # activations on the fly; nothing needs calibrating or exporting.
+    return torch.ao.quantization.quantize_dynamic(_load_torch_model(), {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _load_onnx_model():
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError as e:
+        raise ImproperlyConfigured(
+            'SUMMARY_BACKEND "onnx" requires optimum with ONNX Runtime: pip install "optimum[onnxruntime]"'
+        ) from e
+
+    export_dir = getattr(settings, "SUMMARY_ONNX_DIR", None)
+    if export_dir and os.path.isdir(export_dir):
+        return ORTModelForSeq2SeqLM.from_pretrained(export_dir)
+
+    summary_model = ORTModelForSeq2SeqLM.from_pretrained(SUMMARY_MODEL_NAME, export=True)
+    if export_dir:
+        summary_model.save_pretrained(export_dir)
+    return summary_model
+
+
+# SUMMARY_BACKEND -> loader. Every model exposes the transformers
+# ``generate`` API, so summarize_texts does not care which one it runs.
+BACKENDS = {
+    "torch": _load_torch_model,
+    "torch-int8": _load_quantized_model,
+    "onnx": _load_onnx_model,
+}
+
+
+def summary_backend():
+    return getattr(settings, "SUMMARY_BACKEND", "torch")
+
+
+def get_nlp():
+    return _load_model("nlp", _load_nlp)
+
+
+def get_tokenizer():
+    return _load_model("tokenizer", _load_tokenizer)
+
+
+def get_model(backend=None):
+    backend = backend or summary_backend()
+    try:
+        loader = BACKENDS[backend]
+    except KeyError:
+        raise ImproperlyConfigured(f"Unknown SUMMARY_BACKEND {backend!r}; choose from {sorted(BACKENDS)}") from None
+    return _load_model(f"model:{backend}", loader)
+
+
+def models_loaded():
+    client = get_model_server_client()
+    if client is not None:
+        try:
+            return client.request("ping")
+        except (OSError, ModelServerError):
+            return {"nlp": False, "tokenizer": False, "model": False}
+    return {
+        "nlp": "nlp" in _models,
+        "tokenizer": "tokenizer" in _models,
+        "model": f"model:{summary_backend()}" in _models,
+    }
+
+
+def warmup():
+    """Loads every model and runs one tiny inference through each."""
+    extract_key_clauses("Warm up the pipeline.")
+    summarize_text("This agreement is made between the lender and the borrower for a loan.")
+    return models_loaded()
+
+
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+
+
+def _background_warmup():
+    try:
+        warmup()
+    except Exception as e:
+        print("Model warmup failed:", e)
+
+
+def start_warmup():
+    """Runs ``warmup`` in a background thread unless one is already running.
+
+    A warmup that failed is started again on the next call.
+    """
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is None or not _warmup_thread.is_alive():
+            _warmup_thread = threading.Thread(target=_background_warmup, name="summary-warmup", daemon=True)
+            _warmup_thread.start()
+
+
+def __getattr__(name):
+    # Keeps `from summary.utils import nlp/tokenizer/model` working.
+    loaders = {"nlp": get_nlp, "tokenizer": get_tokenizer, "model": get_model}
+    if name in loaders:
+        return loaders[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 KEY_CLAUSES = {
@@ -25,14 +167,45 @@ KEY_CLAUSES = {
 
 
 
+def iter_pdf_pages(pdf_file):
+    """Yields the text of every page of ``pdf_file`` that has any."""
+    for page_text in iter_raw_pages(pdf_file, **extraction_options("summary")):
+        if page_text:
+            yield page_text
+
+
+def join_pages(pages):
+    return "\n\n".join(pages).strip()
+
+
 def extract_text_from_pdf(pdf_file):
-    text = ""
-    with pdfplumber.open(pdf_file) as pdf:
-        for page in pdf.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n\n"
-    return text.strip()
+    return join_pages(iter_pdf_pages(pdf_file))
+
+
+def iter_page_lines(pages):
+    """Yields the lines of ``join_pages(pages)`` while the pages are read.
+
+    Blank lines are held back until a line with text follows, so the
+    leading and trailing ones that ``strip`` removes are never yielded.
+    The first and last lines keep their outer whitespace, which cleaning
+    strips anyway.
+    """
+    started = False
+    blank = []
+    for index, page in enumerate(pages):
+        lines = page.split("\n")
+        if index:
+            # The blank line "\n\n" leaves between two pages.
+            lines.insert(0, "")
+        for line in lines:
+            if not line.strip():
+                if started:
+                    blank.append(line)
+                continue
+            started = True
+            yield from blank
+            blank.clear()
+            yield line
 
 
 
@@ -41,19 +214,51 @@ def extract_contract_type(text):
     match = re.search(r'(?i)([A-Z\s]+(?:AGREEMENT|CONTRACT|DEED|MEMORANDUM|POLICY|LEASE|LOAN|MORTGAGE|NDA))', cleaned_text)
     return match.group(1).strip() if match else "Unknown Contract Type"
 
-def clean_text(text):
+def clean_text(text, batch_size=None, n_process=None):
+    """Drops stop words and punctuation from every line of ``text``.
+
+    ``is_stop`` and ``is_punct`` are lexical attributes, so the lines only
+    need tokenizing: every pipeline component is disabled and the lines go
+    through ``nlp.pipe`` in batches, optionally over ``n_process`` processes.
+    """
+    return clean_lines(text.split("\n"), batch_size, n_process)
+
+
+def clean_pages(pages, batch_size=None, n_process=None):
+    """Cleans ``join_pages(pages)`` like ``clean_text``, reading pages lazily.
+
+    Each batch of lines goes through spaCy as soon as the pages holding it
+    have been extracted.
+    """
+    return clean_lines(iter_page_lines(pages), batch_size, n_process)
+
+
+def clean_lines(lines, batch_size=None, n_process=None):
+    client = get_model_server_client()
+    if client is not None:
+        return client.request("clean", text="\n".join(lines), batch_size=batch_size, n_process=n_process)
+
+    nlp = get_nlp()
+    batch_size = batch_size or getattr(settings, "SUMMARY_CLEAN_BATCH_SIZE", 1000)
+    n_process = n_process or getattr(settings, "SUMMARY_CLEAN_PROCESSES", 1)
+    lines = (line.strip() for line in lines)
+    docs = nlp.pipe(lines, batch_size=batch_size, n_process=n_process, disable=nlp.pipe_names)
+
     cleaned_lines = []
-    for line in text.split("\n"):
-        doc = nlp(line.strip())
+    for doc in docs:
         cleaned_line = " ".join([token.text for token in doc if not token.is_stop and not token.is_punct])
         cleaned_lines.append(cleaned_line)
     return "\n".join(cleaned_lines)
 
 
 def extract_key_clauses(text):
+    client = get_model_server_client()
+    if client is not None:
+        return client.request("clauses", text=text)
+
     extracted_clauses = {clause: [] for clause in KEY_CLAUSES}
     text = re.sub(r'\s+', ' ', text)
-    doc = nlp(text)
+    doc = get_nlp()(text)
 
     for sent in doc.sents:
         sentence_text = sent.text.lower()
@@ -68,42 +273,155 @@ def extract_key_clauses(text):
 
 
 def preprocess_for_summary(text):
+    # Inputs are already sized by chunk_text; the tokenizer truncates anything
+    # longer to the model's maximum, so no character cap is applied here.
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+
+def split_sentences(text):
     text = re.sub(r'\s+', ' ', text).strip()
-    return text[:4096] 
+    return [sentence for sentence in SENTENCE_BOUNDARY.split(text) if sentence]
+
+
+def _split_long_sentence(tokenizer, token_ids, budget):
+    # Leave a little room: decoding a window and re-encoding it can shift
+    # token boundaries at the edges.
+    window = max(1, budget - 8)
+    for start in range(0, len(token_ids), window):
+        piece = tokenizer.decode(token_ids[start:start + window]).strip()
+        if piece:
+            yield piece
+
+
+def chunk_text(text, max_len=None, overlap=0):
+    """Packs whole sentences into chunks that fit the model's input.
+
+    Every sentence is tokenized once, and token counts are accumulated, so
+    the cost is linear in the text length. Sentences are joined with a
+    single space, so a chunk's token count is exactly the sum of its parts.
+    ``overlap`` repeats the last N sentences of a chunk at the start of the
+    next one.
+    """
+    tokenizer = get_tokenizer()
+    max_len = max_len or tokenizer.model_max_length
+    budget = max_len - tokenizer.num_special_tokens_to_add()
+
+    sentences = split_sentences(text)
+    if not sentences:
+        return []
+
+    # A sentence costs a token or so more when it follows another one,
+    # because the joining space is folded into its first token.
+    leading = tokenizer(sentences, add_special_tokens=False)["input_ids"]
+    following = tokenizer([" " + sentence for sentence in sentences], add_special_tokens=False)["input_ids"]
+
+    pieces = []
+    for sentence, leading_ids, following_ids in zip(sentences, leading, following):
+        if max(len(leading_ids), len(following_ids)) <= budget:
+            pieces.append((sentence, len(leading_ids), len(following_ids)))
+            continue
+        for piece in _split_long_sentence(tokenizer, leading_ids, budget):
+            counts = tokenizer([piece, " " + piece], add_special_tokens=False)["input_ids"]
+            pieces.append((piece, len(counts[0]), len(counts[1])))
+
+    def length_of(indices):
+        if not indices:
+            return 0
+        return pieces[indices[0]][1] + sum(pieces[index][2] for index in indices[1:])
 
-def chunk_text(text, max_len=1024):
-    sentences = text.split(". ")
     chunks = []
-    chunk = ""
-    for sentence in sentences:
-        if len(tokenizer.encode(chunk + sentence, truncation=False)) < max_len:
-            chunk += sentence + ". "
-        else:
-            chunks.append(chunk.strip())
-            chunk = sentence + ". "
-    if chunk:
-        chunks.append(chunk.strip())
+    current = []
+    length = 0
+    for index, (_, leading_count, following_count) in enumerate(pieces):
+        if current and length + following_count > budget:
+            chunks.append(" ".join(pieces[i][0] for i in current))
+            current = current[-overlap:] if overlap else []
+            while current and length_of(current) + following_count > budget:
+                current = current[1:]
+            length = length_of(current)
+        length += following_count if current else leading_count
+        current.append(index)
+
+    if current:
+        chunks.append(" ".join(pieces[i][0] for i in current))
     return chunks
 
 
+GENERATION_KWARGS = {
+    "max_length": 200,
+    "num_beams": 1,
+    "do_sample": True,
+    "top_k": 50,
+    "top_p": 0.9,
+    "temperature": 0.95,
+    "early_stopping": True,
+}
+
+# SUMMARY_GENERATION -> generate() arguments. Only the deterministic modes
+# give the same summary for the same text, so only they are cached.
+GENERATION_MODES = {
+    "sample": GENERATION_KWARGS,
+    "greedy": {"max_length": 200, "num_beams": 1, "do_sample": False},
+    "beam": {"max_length": 200, "num_beams": 4, "do_sample": False, "early_stopping": True},
+}
+DETERMINISTIC_GENERATION_MODES = ("greedy", "beam")
+
+
+def generation_mode(generation=None):
+    generation = generation or getattr(settings, "SUMMARY_GENERATION", "sample")
+    if generation not in GENERATION_MODES:
+        raise ValueError(f"Unknown generation mode {generation!r}; choose from {sorted(GENERATION_MODES)}")
+    return generation
+
+
+def iter_summaries(texts, batch_size=None, backend=None, generation_kwargs=None):
+    """Summarizes several texts, running ``generate`` once per batch.
+
+    Inputs in a batch are padded to the longest one. Summaries are yielded
+    in the order of ``texts`` as soon as their batch is done.
+    ``backend`` overrides ``settings.SUMMARY_BACKEND``.
+    """
+    batch_size = batch_size or _batch_size()
+    generation_kwargs = generation_kwargs or GENERATION_KWARGS
+
+    # With SUMMARY_MODEL_SERVER set, the batches are generated by the shared
+    # model server, which may merge them with other workers' requests.
+    client = None if backend else get_model_server_client()
+    if client is not None:
+        for start in range(0, len(texts), batch_size):
+            yield from client.summarize(texts[start:start + batch_size], generation_kwargs)
+        return
+
+    import torch
+
+    configure_torch_threads()
+    tokenizer = get_tokenizer()
+    model = get_model(backend)
+
+    for start in range(0, len(texts), batch_size):
+        batch = [preprocess_for_summary(text) for text in texts[start:start + batch_size]]
+        inputs = tokenizer(batch, return_tensors="pt", padding=True, truncation=True, max_length=1024)
+
+        with torch.no_grad():
+            summary_ids = model.generate(
+                inputs["input_ids"],
+                attention_mask=inputs["attention_mask"],
+                **generation_kwargs
+            )
+
+        for summary in tokenizer.batch_decode(summary_ids, skip_special_tokens=True):
+            yield summary.strip()
+
+
+def summarize_texts(texts, batch_size=None, backend=None, generation_kwargs=None):
+    return list(iter_summaries(texts, batch_size, backend, generation_kwargs))
+
+
 def summarize_text(text):
-    text = preprocess_for_summary(text)
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=1024)
-    
-    with torch.no_grad():
-        summary_ids = model.generate(
-            inputs["input_ids"],
-            max_length=200,
-            num_beams=1,
-            do_sample=True,
-            top_k=50,
-            top_p=0.9,
-            temperature=0.95,
-            early_stopping=True
-        )
-
-    summary = tokenizer.decode(summary_ids[0], skip_special_tokens=True)
-    return summary.strip()
+    return summarize_texts([text])[0]
 
 def format_summary(summary_text, title="Summary Section"):
     lines = summary_text.strip().split(". ")
@@ -117,30 +435,210 @@ def format_summary(summary_text, title="Summary Section"):
             formatted += f"• {line}\n"
     return formatted.strip()
 
-def generate_full_summary(text):
-    chunks = chunk_text(text)
-    summaries = [summarize_text(chunk) for chunk in chunks]
-    
-    formatted_summaries = []
+def _batch_size():
+    return getattr(settings, "SUMMARY_BATCH_SIZE", 4)
+
+
+def _generate_calls(count, batch_size):
+    return -(-count // batch_size)
+
+
+def _reduce_calls(count, batch_size, per_input):
+    calls = 0
+    while count > 1:
+        count = -(-count // per_input)
+        calls += _generate_calls(count, batch_size)
+    return calls
+
+
+def _summaries_per_input():
+    tokenizer = get_tokenizer()
+    budget = tokenizer.model_max_length - tokenizer.num_special_tokens_to_add()
+    return max(2, budget // GENERATION_KWARGS["max_length"])
+
+
+def _spread(items, count):
+    """Picks ``count`` items evenly spaced across ``items``, keeping order."""
+    if count >= len(items):
+        return list(items)
+    if count <= 1:
+        return list(items[:count])
+    step = (len(items) - 1) / (count - 1)
+    return [items[round(i * step)] for i in range(count)]
+
+
+def plan_chunks(chunks, budget=None, hierarchical=False):
+    """Drops chunks until summarizing them fits ``budget`` generate calls.
+
+    In hierarchical mode the calls the reduce rounds will need are reserved
+    first. Kept chunks are spread evenly over the document, so a very long
+    document is sampled throughout rather than cut off after its opening.
+    ``SUMMARY_GENERATE_BUDGET`` is the default budget in hierarchical mode
+    only: in sections mode every chunk gets its own section, so dropping
+    chunks would silently leave parts of the document out.
+    """
+    if budget is None and hierarchical:
+        budget = getattr(settings, "SUMMARY_GENERATE_BUDGET", None)
+    if not budget:
+        return chunks
+
+    batch_size = _batch_size()
+    per_input = _summaries_per_input() if hierarchical else None
+
+    def calls(count):
+        total = _generate_calls(count, batch_size)
+        if hierarchical:
+            total += _reduce_calls(count, batch_size, per_input)
+        return total
+
+    count = len(chunks)
+    while count > 1 and calls(count) > budget:
+        count -= 1
+    return _spread(chunks, count)
+
+
+def reduce_summaries(summaries, budget=None, generation_kwargs=None):
+    """Summarizes the concatenated section summaries until one remains.
+
+    Each round packs as many summaries into one model input as fit and
+    summarizes the groups in batches. If ``budget`` generate calls run out
+    first, the remaining summaries are joined as they are.
+    """
+    batch_size = _batch_size()
+    while len(summaries) > 1:
+        groups = chunk_text(" ".join(summaries))
+        calls = _generate_calls(len(groups), batch_size)
+        if len(groups) >= len(summaries) or (budget is not None and calls > budget):
+            break
+        summaries = summarize_texts(groups, batch_size, generation_kwargs=generation_kwargs)
+        if budget is not None:
+            budget -= calls
+    return " ".join(summaries)
+
+
+def summary_mode():
+    return getattr(settings, "SUMMARY_MODE", "sections")
+
+
+def _summary_mode(mode):
+    mode = mode or summary_mode()
+    if mode not in ("sections", "hierarchical"):
+        raise ValueError(f"Unknown summary mode {mode!r}")
+    return mode
+
+
+def plan_summary_chunks(text, mode=None):
+    """The chunks of ``text`` that will be summarized, after the budget."""
+    chunks = chunk_text(text, overlap=getattr(settings, "SUMMARY_CHUNK_OVERLAP", 0))
+    return plan_chunks(chunks, hierarchical=_summary_mode(mode) == "hierarchical")
+
+
+def iter_summary_sections(text, mode=None, generation=None, chunks=None):
+    """Yields the formatted sections of the summary of ``text`` one by one.
+
+    ``mode`` is ``"sections"`` or ``"hierarchical"`` and defaults to
+    ``settings.SUMMARY_MODE``; hierarchical mode respects
+    ``SUMMARY_GENERATE_BUDGET``. ``generation`` picks one of ``GENERATION_MODES``. In sections mode each
+    section is yielded as soon as its generate batch finishes. ``chunks``
+    may pass in the result of ``plan_summary_chunks`` for ``text``.
+    """
+    generation_kwargs = GENERATION_MODES[generation_mode(generation)]
+    mode = _summary_mode(mode)
+    hierarchical = mode == "hierarchical"
+
+    if chunks is None:
+        chunks = plan_summary_chunks(text, mode)
+    summaries = iter_summaries(chunks, generation_kwargs=generation_kwargs)
+
+    if hierarchical:
+        summaries = list(summaries)
+        if not summaries:
+            return
+        budget = getattr(settings, "SUMMARY_GENERATE_BUDGET", None)
+        if budget:
+            budget -= _generate_calls(len(chunks), _batch_size())
+        yield format_summary(reduce_summaries(summaries, budget, generation_kwargs), title="Document Summary")
+        return
+
     for i, summary in enumerate(summaries, start=1):
-        formatted_summaries.append(format_summary(summary, title=f"Summary Section {i}"))
-    
-    return "\n\n".join(formatted_summaries)
+        yield format_summary(summary, title=f"Summary Section {i}")
+
+
+def join_summary_sections(sections):
+    return "\n\n".join(sections)
+
+
+def split_summary_sections(summary):
+    return [section for section in re.split(r'\n\n(?=🔹 )', summary) if section]
+
+
+def generate_full_summary(text, mode=None, generation=None):
+    return join_summary_sections(iter_summary_sections(text, mode, generation))
+
+
+# Stored text is "v2:" + base64(nonce + AES-GCM(zlib(text)) + tag). Values
+# without a version prefix are the original base64(iv + AES-CBC(text)).
+ENVELOPE_VERSION = "v2"
+ENVELOPE_PREFIX = ENVELOPE_VERSION + ":"
+GCM_NONCE_SIZE = 12
+GCM_TAG_SIZE = 16
+# Cleaned contract text still shrinks several-fold at level 3, for a fraction
+# of the time the default level takes.
+ENVELOPE_COMPRESSION_LEVEL = 3
+
+
+def encrypt_text_stream(pieces):
+    """Compresses and encrypts an iterable of text pieces into one envelope.
+
+    Pieces are compressed and encrypted as they arrive, so a large text
+    never needs to be held both as plain text and as ciphertext.
+    """
+    nonce = os.urandom(GCM_NONCE_SIZE)
+    encryptor = Cipher(algorithms.AES(settings.AES_ENCRYPTION_KEY), modes.GCM(nonce)).encryptor()
+    encryptor.authenticate_additional_data(ENVELOPE_VERSION.encode())
+    compressor = zlib.compressobj(ENVELOPE_COMPRESSION_LEVEL)
+
+    sealed = bytearray(nonce)
+    for piece in pieces:
+        sealed += encryptor.update(compressor.compress(piece.encode()))
+    sealed += encryptor.update(compressor.flush())
+    sealed += encryptor.finalize()
+    sealed += encryptor.tag
+    return ENVELOPE_PREFIX + base64.b64encode(sealed).decode()
 
 
 def encrypt_text(plain_text):
-    key = settings.AES_ENCRYPTION_KEY
-    iv = get_random_bytes(16)
-    cipher = AES.new(key, AES.MODE_CBC, iv)
-    encrypted = cipher.encrypt(pad(plain_text.encode(), AES.block_size))
-    return base64.b64encode(iv + encrypted).decode()
+    return encrypt_text_stream([plain_text])
 
 
-def decrypt_text(encrypted_text):
-    key = settings.AES_ENCRYPTION_KEY
-    raw_data = base64.b64decode(encrypted_text)
+def _decrypt_envelope(encoded):
+    sealed = base64.b64decode(encoded)
+    nonce = sealed[:GCM_NONCE_SIZE]
+    tag = sealed[-GCM_TAG_SIZE:]
+    decryptor = Cipher(algorithms.AES(settings.AES_ENCRYPTION_KEY), modes.GCM(nonce, tag)).decryptor()
+    decryptor.authenticate_additional_data(ENVELOPE_VERSION.encode())
+    compressed = decryptor.update(sealed[GCM_NONCE_SIZE:-GCM_TAG_SIZE]) + decryptor.finalize()
+    return zlib.decompress(compressed).decode()
+
+
+def _decrypt_legacy_cbc(encoded):
+    raw_data = base64.b64decode(encoded)
     iv = raw_data[:16]
-    cipher_text = raw_data[16:]
-    cipher = AES.new(key, AES.MODE_CBC, iv)
-    decrypted = unpad(cipher.decrypt(cipher_text), AES.block_size)
-    return decrypted.decode()
\ No newline at end of file
+    decryptor = Cipher(algorithms.AES(settings.AES_ENCRYPTION_KEY), modes.CBC(iv)).decryptor()
+    unpadder = padding.PKCS7(algorithms.AES.block_size).unpadder()
+    padded = decryptor.update(raw_data[16:]) + decryptor.finalize()
+    return (unpadder.update(padded) + unpadder.finalize()).decode()
+
+
+def decrypt_text(encrypted_text):
+    if encrypted_text.startswith(ENVELOPE_PREFIX):
+        return _decrypt_envelope(encrypted_text[len(ENVELOPE_PREFIX):])
+    return _decrypt_legacy_cbc(encrypted_text)
+
+
+def encrypt_key_clauses(key_clauses):
+    return encrypt_text(json.dumps(key_clauses))
+
+
+def decrypt_key_clauses(encrypted_key_clauses):
+    return json.loads(decrypt_text(encrypted_key_clauses))
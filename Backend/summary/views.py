@@ -2,18 +2,30 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authentication import SessionAuthentication, BasicAuthentication
-from django.http import JsonResponse
+import base64
+import json
+from datetime import datetime
+from django.conf import settings
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.core.files.storage import default_storage
+from jobs.queue import enqueue_job, job_accepted_response, wants_async
+from documents.uploads import retain_uploaded_file
 from .models import UploadedDocument
+from .cache import cached_full_summary, cached_user_response, invalidate_user_documents
+from .pipeline import document_key_clauses, iter_upload_events, process_upload
+from .scheduler import (
+    InferenceOverloaded,
+    InferenceTimings,
+    SlotHoldingStream,
+    admit_inference,
+    overloaded_response,
+)
 from .utils import (
-    extract_text_from_pdf,
-    extract_contract_type,
-    clean_text,
-    extract_key_clauses,
-    generate_full_summary,
-    encrypt_text,
+    GENERATION_MODES,
     decrypt_text,
+    models_loaded,
+    start_warmup,
 )
 
 
@@ -22,6 +34,29 @@ def hello_world(request):
     return Response({"message": "Hello from Django!"})
 
 
+@api_view(["GET"])
+def readiness(request):
+    loaded = models_loaded()
+    ready = all(loaded.values())
+    if not ready:
+        # The first probe starts loading the models and running a dummy
+        # inference, so an instance becomes ready without real traffic.
+        start_warmup()
+    return JsonResponse({"ready": ready, "models": loaded}, status=200 if ready else 503)
+
+
+LISTING_FIELDS = ("id", "file_name", "contract_type", "upload_date")
+
+
+def _document_item(doc):
+    return {
+        "id": doc.id,
+        "title": doc.file_name,
+        "contractType": doc.contract_type,
+        "uploadDate": doc.upload_date.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
 @api_view(["GET"])
 def get_recent_documents(request):
     username = request.GET.get("user_name")
@@ -29,20 +64,70 @@ def get_recent_documents(request):
     if not username:
         return JsonResponse({"error": "Username is required"}, status=400)
 
-    recent_docs = UploadedDocument.objects.filter(user_name=username).order_by('-upload_date')[:3]
+    def build():
+        recent_docs = (
+            UploadedDocument.objects.filter(user_name=username)
+            .only(*LISTING_FIELDS, "summary")
+            .order_by('-upload_date', '-id')[:3]
+        )
+        return {"recent_documents": [dict(_document_item(doc), summary=doc.summary) for doc in recent_docs]}
+
+    return JsonResponse(cached_user_response(username, "recent", {}, build))
+
+
+def _encode_cursor(doc):
+    value = f"{doc.upload_date.isoformat()}|{doc.id}"
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def _decode_cursor(cursor):
+    upload_date, document_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    parsed = datetime.fromisoformat(upload_date)
+    return parsed, int(document_id)
+
+
+@api_view(["GET"])
+def list_documents(request):
+    """Pages through a user's documents, newest first.
+
+    Pass the returned ``next_cursor`` as ``cursor`` to get the next page;
+    it is ``null`` on the last page. Pages are found through the
+    (user_name, upload_date, id) index, however deep the history goes.
+    """
+    username = request.GET.get("user_name")
+    if not username:
+        return JsonResponse({"error": "Username is required"}, status=400)
+
+    max_limit = getattr(settings, "SUMMARY_LISTING_MAX_PAGE_SIZE", 100)
+    try:
+        limit = min(max(int(request.GET.get("limit", 20)), 1), max_limit)
+    except ValueError:
+        return JsonResponse({"error": "limit must be an integer"}, status=400)
+
+    cursor = request.GET.get("cursor")
+    after = None
+    if cursor:
+        try:
+            after = _decode_cursor(cursor)
+        except (ValueError, UnicodeDecodeError):
+            return JsonResponse({"error": "Invalid cursor"}, status=400)
 
-    documents_data = [
-        {
-            "id": doc.id,
-            "title": doc.file_name,
-            "contractType": doc.contract_type,
-            "uploadDate": doc.upload_date.strftime('%Y-%m-%d %H:%M:%S'),
-            "summary": doc.summary, 
+    def build():
+        documents = UploadedDocument.objects.filter(user_name=username)
+        if after is not None:
+            upload_date, document_id = after
+            documents = documents.filter(
+                Q(upload_date__lt=upload_date) | Q(upload_date=upload_date, id__lt=document_id)
+            )
+        page = list(documents.only(*LISTING_FIELDS).order_by("-upload_date", "-id")[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+        return {
+            "documents": [_document_item(doc) for doc in page],
+            "next_cursor": _encode_cursor(page[-1]) if has_more else None,
         }
-        for doc in recent_docs
-    ]
 
-    return JsonResponse({"recent_documents": documents_data})
+    return JsonResponse(cached_user_response(username, "list", {"cursor": cursor, "limit": limit}, build))
 
 
 @csrf_exempt
@@ -58,39 +143,83 @@ def extract_text(request):
         if not uploaded_file.name.lower().endswith(".pdf"):
             return JsonResponse({"error": "Only PDF files are supported"}, status=400)
 
-        file_path = default_storage.save(f"uploads/{uploaded_file.name}", uploaded_file)
-        file_path = default_storage.path(file_path)
-
-        with open(file_path, "rb") as pdf_file:
-            extracted_text = extract_text_from_pdf(pdf_file)
-
-        cleaned = clean_text(extracted_text)
-        encrypted_cleaned = encrypt_text(cleaned)
-        decrypted_cleaned = decrypt_text(encrypted_cleaned)
-        summary = generate_full_summary(decrypted_cleaned)
-        contract_type = extract_contract_type(cleaned)
-        key_clauses = extract_key_clauses(extracted_text)
-
-        doc = UploadedDocument.objects.create(
-            user_name=user_name,
-            file_name=uploaded_file.name,
-            contract_type=contract_type,
-            encrypted_cleaned=encrypted_cleaned,
-            summary=summary,
-        )
+        retain_uploaded_file(uploaded_file)
 
-        return JsonResponse({
-            "summary": summary,
-            "keyClauses": key_clauses,
-            "contract_type": contract_type,
-            "document_id": doc.id
-        })
+        if wants_async(request):
+            job = enqueue_job("summary.extract_text", uploaded_file, {"user_name": user_name})
+            return job_accepted_response(request, job)
+
+        try:
+            slot = admit_inference()
+        except InferenceOverloaded as e:
+            return overloaded_response(e)
+        with slot:
+            payload = process_upload(uploaded_file, uploaded_file.name, user_name)
+
+        response = JsonResponse(payload)
+        response["Server-Timing"] = slot.timings.server_timing()
+        return response
 
     except Exception as e:
         print("ERROR in extract_text:", str(e))
         return JsonResponse({"error": f"Server error: {str(e)}"}, status=500)
 
 
+def _event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+def _upload_events(uploaded_file, user_name, slot):
+    try:
+        for event, data in iter_upload_events(uploaded_file, uploaded_file.name, user_name):
+            if event == "done":
+                # Headers went out before any work was done, so the full
+                # timings travel with the last event.
+                timings = InferenceTimings()
+                timings.queue_seconds = slot.timings.queue_seconds
+                timings.compute_seconds = slot.elapsed()
+                data = dict(data, server_timing=timings.server_timing())
+            yield _event(event, data)
+    except Exception as e:
+        print("ERROR in extract_text_stream:", str(e))
+        yield _event("error", {"error": f"Server error: {str(e)}"})
+
+
+@csrf_exempt
+@api_view(["POST"])
+def extract_text_stream(request):
+    """Like ``extract_text``, but answers with server-sent events.
+
+    ``document`` (contract type and key clauses) is sent first, then one
+    ``section`` event per summary section, then ``done`` with the payload
+    ``extract_text`` returns once the document is saved. The
+    ``Server-Timing`` header only covers the queue wait; ``done`` carries
+    the queue and inference times as ``server_timing``.
+    """
+    if "file" not in request.FILES:
+        return JsonResponse({"error": "No file uploaded"}, status=400)
+
+    uploaded_file = request.FILES["file"]
+    if not uploaded_file.name.lower().endswith(".pdf"):
+        return JsonResponse({"error": "Only PDF files are supported"}, status=400)
+
+    retain_uploaded_file(uploaded_file)
+
+    try:
+        slot = admit_inference()
+    except InferenceOverloaded as e:
+        return overloaded_response(e)
+
+    response = StreamingHttpResponse(
+        SlotHoldingStream(_upload_events(uploaded_file, request.POST.get("user_name"), slot), slot),
+        content_type="text/event-stream",
+    )
+    response["Server-Timing"] = slot.timings.server_timing()
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 @api_view(["GET"])
 def get_document_summary(request):
     document_id = request.GET.get("document_id")
@@ -100,11 +229,10 @@ def get_document_summary(request):
         return JsonResponse({"error": "Document ID and user_name are required"}, status=400)
 
     try:
-        doc = UploadedDocument.objects.get(id=document_id, user_name=username)
-        decrypted_text = decrypt_text(doc.encrypted_cleaned)
+        doc = UploadedDocument.objects.defer("encrypted_cleaned").get(id=document_id, user_name=username)
         return JsonResponse({
             "summary": doc.summary,
-            "keyClauses": extract_key_clauses(decrypted_text),
+            "keyClauses": document_key_clauses(doc),
             "contract_type": doc.contract_type,
             "file_name": doc.file_name,
             "document_id": doc.id,
@@ -119,21 +247,36 @@ def get_document_summary(request):
 @csrf_exempt
 @api_view(["POST"])
 def regenerate_summary(request, document_id):
+    # Regenerating defaults to a fresh sampled variant; pass generation=greedy
+    # or beam (and use_cache=true) to get the reproducible, cached summary.
+    generation = request.POST.get("generation") or request.GET.get("generation") or "sample"
+    use_cache = (request.POST.get("use_cache") or request.GET.get("use_cache") or "").lower() in ("1", "true", "yes")
+    if generation not in GENERATION_MODES:
+        return JsonResponse({"error": f"generation must be one of {sorted(GENERATION_MODES)}"}, status=400)
+
     try:
         doc = UploadedDocument.objects.get(id=document_id)
 
         decrypted_cleaned = decrypt_text(doc.encrypted_cleaned)
 
-        new_summary = generate_full_summary(decrypted_cleaned)
-        key_clauses = extract_key_clauses(decrypted_cleaned)
+        try:
+            slot = admit_inference()
+        except InferenceOverloaded as e:
+            return overloaded_response(e)
+        with slot:
+            new_summary = cached_full_summary(decrypted_cleaned, generation=generation, use_cache=use_cache)
+            key_clauses = document_key_clauses(doc)
 
         doc.summary = new_summary
-        doc.save()
+        doc.save(update_fields=["summary"])
+        invalidate_user_documents(doc.user_name)
 
-        return JsonResponse({
+        response = JsonResponse({
             "summary": new_summary,
             "keyClauses": key_clauses,
         })
+        response["Server-Timing"] = slot.timings.server_timing()
+        return response
 
     except UploadedDocument.DoesNotExist:
         return JsonResponse({"error": "Document not found"}, status=404)